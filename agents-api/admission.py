@@ -0,0 +1,161 @@
+import hashlib
+import math
+import os
+import time
+
+from runs import MAX_CONCURRENT_RUNS
+from telemetry import Counter, registry
+
+# Runs allowed to wait for a free crew slot; requests beyond slots + queue are rejected
+# with 429
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "8"))
+# Runs one tenant may have admitted (running or queued) at once
+TENANT_MAX_RUNS = int(os.getenv("TENANT_MAX_RUNS", "2"))
+# Header carrying the caller's API key; only keys listed in TENANT_API_KEYS identify a
+# tenant, every other client is grouped by address
+TENANT_HEADER = os.getenv("TENANT_HEADER", "x-api-key").lower()
+TENANT_API_KEYS = [
+    key.strip() for key in os.getenv("TENANT_API_KEYS", "").split(",") if key.strip()
+]
+# Proxies that append to X-Forwarded-For in front of the API: CloudFront, then the load
+# balancer
+TRUSTED_PROXY_COUNT = int(os.getenv("TRUSTED_PROXY_COUNT", "2"))
+# Retry-After used until run durations have been observed
+ADMISSION_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", "30"))
+MAX_RETRY_AFTER = 600
+
+ADMISSION_REJECTIONS = registry.register(
+    Counter(
+        "agent_api_admission_rejections_total",
+        "Mission runs rejected with 429",
+        ["reason"],
+    )
+)
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason, retry_after):
+        super().__init__(f"Too many mission runs ({reason}), retry in {retry_after}s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def key_digest(key):
+    # Only a digest is kept, so API keys never sit in memory or metrics
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+
+
+TENANT_KEY_DIGESTS = {key_digest(key) for key in TENANT_API_KEYS}
+
+
+def tenant_of(request):
+    key = request.headers.get(TENANT_HEADER)
+    # Unknown keys are ignored, or a client could pick a new tenant for every request
+    if key and key_digest(key) in TENANT_KEY_DIGESTS:
+        return "key:" + key_digest(key)
+    # Entries to the left of what the trusted proxies appended are supplied by the
+    # client. CloudFront appends the viewer's address and the load balancer
+    # CloudFront's, so the client is the second entry from the right
+    forwarded = [
+        address.strip()
+        for address in request.headers.get("x-forwarded-for", "").split(",")
+        if address.strip()
+    ]
+    if TRUSTED_PROXY_COUNT and len(forwarded) >= TRUSTED_PROXY_COUNT:
+        return "ip:" + forwarded[-TRUSTED_PROXY_COUNT]
+    return "ip:" + (request.client.host if request.client else "unknown")
+
+
+class Ticket:
+    """An admitted run; releasing it frees its place in the queue and its tenant's
+    quota."""
+
+    def __init__(self, controller, tenant):
+        self.controller = controller
+        self.tenant = tenant
+        self.admitted_at = time.monotonic()
+        self.released = False
+        self.held = False
+
+    def release(self):
+        # Idempotent, since streamed responses release from both the crew and a
+        # background task
+        if not self.released:
+            self.released = True
+            self.controller.release(self)
+
+    def hold_until(self, future):
+        """Keeps the admission until future finishes, even if the client that started
+        the run goes away."""
+        self.held = True
+        future.add_done_callback(lambda _: self.release())
+
+    def release_unless_held(self):
+        # For responses whose run may never have started, e.g. the client disconnected
+        # first
+        if not self.held:
+            self.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+class AdmissionController:
+    """Admits at most slots + max_queue runs at once, and at most tenant_limit per
+    tenant.
+
+    Only used from the event loop, so the counters need no lock.
+    """
+
+    def __init__(
+        self,
+        slots=MAX_CONCURRENT_RUNS,
+        max_queue=ADMISSION_MAX_QUEUE,
+        tenant_limit=TENANT_MAX_RUNS,
+    ):
+        self.slots = slots
+        self.max_queue = max_queue
+        self.tenant_limit = tenant_limit
+        self.active = 0
+        self.tenants = {}
+        # Moving average of how long an admitted run holds its place
+        self.average_duration = None
+
+    def admit(self, tenant):
+        if self.tenants.get(tenant, 0) >= self.tenant_limit:
+            ADMISSION_REJECTIONS.inc(reason="tenant")
+            # The tenant waits for one of its own runs, i.e. about one run duration
+            raise AdmissionRejected("tenant", self.retry_after(self.slots))
+        if self.active >= self.slots + self.max_queue:
+            ADMISSION_REJECTIONS.inc(reason="capacity")
+            raise AdmissionRejected(
+                "capacity", self.retry_after(self.active - self.slots + 1)
+            )
+
+        self.active += 1
+        self.tenants[tenant] = self.tenants.get(tenant, 0) + 1
+        return Ticket(self, tenant)
+
+    def release(self, ticket):
+        self.active -= 1
+        remaining = self.tenants.get(ticket.tenant, 1) - 1
+        if remaining > 0:
+            self.tenants[ticket.tenant] = remaining
+        else:
+            self.tenants.pop(ticket.tenant, None)
+
+        duration = time.monotonic() - ticket.admitted_at
+        if self.average_duration is None:
+            self.average_duration = duration
+        else:
+            self.average_duration = 0.8 * self.average_duration + 0.2 * duration
+
+    def retry_after(self, runs_ahead):
+        # Time for the runs ahead of this one to drain through the slots
+        if self.average_duration is None:
+            return ADMISSION_RETRY_AFTER
+        estimate = self.average_duration * max(runs_ahead, 1) / self.slots
+        return min(max(math.ceil(estimate), 1), MAX_RETRY_AFTER)
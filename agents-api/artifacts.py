@@ -0,0 +1,258 @@
+import contextlib
+import mimetypes
+import os
+import re
+import threading
+import time
+import uuid
+
+import boto3
+
+from logs import logger
+
+# "local" keeps artifacts on this container's disk; "s3" stores them in
+# ARTIFACT_S3_BUCKET
+ARTIFACT_BACKEND = os.getenv("ARTIFACT_BACKEND", "local").lower()
+ARTIFACT_DIR = os.getenv("ARTIFACT_DIR", "./images")
+ARTIFACT_S3_BUCKET = os.getenv("ARTIFACT_S3_BUCKET", "")
+ARTIFACT_S3_PREFIX = os.getenv("ARTIFACT_S3_PREFIX", "artifacts/")
+# Lets the S3 backend talk to an S3-compatible stand-in such as MinIO or moto
+ARTIFACT_S3_ENDPOINT = os.getenv("ARTIFACT_S3_ENDPOINT") or None
+ARTIFACT_MAX_MB = float(os.getenv("ARTIFACT_MAX_MB", "1024"))
+ARTIFACT_MAX_AGE = int(os.getenv("ARTIFACT_MAX_AGE", "86400"))
+ARTIFACT_CLEANUP_INTERVAL = int(os.getenv("ARTIFACT_CLEANUP_INTERVAL", "300"))
+
+ARTIFACT_ID_PATTERN = re.compile(r"[0-9a-f]{32}\.[a-z0-9]{1,5}")
+
+
+def validate_artifact_id(artifact_id):
+    if not ARTIFACT_ID_PATTERN.fullmatch(artifact_id):
+        raise ValueError(f"Invalid artifact ID: {artifact_id}")
+    return artifact_id
+
+
+def content_type_of(artifact_id):
+    return mimetypes.guess_type(artifact_id)[0] or "application/octet-stream"
+
+
+class LocalArtifactBackend:
+    def __init__(self, root=ARTIFACT_DIR):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.root, key)
+
+    def put(self, key, data, content_type):
+        # Write to a temporary name first so readers never see a partially written file
+        temporary_path = f"{self.path(key)}.tmp"
+        with open(temporary_path, "wb") as file:
+            file.write(data)
+        os.replace(temporary_path, self.path(key))
+
+    def get(self, key):
+        try:
+            with open(self.path(key), "rb") as file:
+                return file.read()
+        except FileNotFoundError:
+            return None
+
+    def delete(self, key):
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self.path(key))
+
+    def list(self):
+        """Yields (key, size, modified_at) for every stored artifact."""
+        for entry in os.scandir(self.root):
+            if entry.is_file() and ARTIFACT_ID_PATTERN.fullmatch(entry.name):
+                stat = entry.stat()
+                yield entry.name, stat.st_size, stat.st_mtime
+
+
+class S3ArtifactBackend:
+    def __init__(
+        self,
+        bucket=ARTIFACT_S3_BUCKET,
+        prefix=ARTIFACT_S3_PREFIX,
+        endpoint_url=ARTIFACT_S3_ENDPOINT,
+    ):
+        if not bucket:
+            raise ValueError(
+                "ARTIFACT_S3_BUCKET is required for the s3 artifact backend"
+            )
+        self.bucket = bucket
+        self.prefix = prefix
+        self.s3 = boto3.client('s3', endpoint_url=endpoint_url)
+
+    def path(self, key):
+        return None
+
+    def put(self, key, data, content_type):
+        self.s3.put_object(
+            Bucket=self.bucket,
+            Key=self.prefix + key,
+            Body=data,
+            ContentType=content_type,
+        )
+
+    def get(self, key):
+        try:
+            response = self.s3.get_object(Bucket=self.bucket, Key=self.prefix + key)
+        except self.s3.exceptions.NoSuchKey:
+            return None
+        return response["Body"].read()
+
+    def delete(self, key):
+        self.s3.delete_object(Bucket=self.bucket, Key=self.prefix + key)
+
+    def list(self):
+        paginator = self.s3.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix):
+            for item in page.get('Contents', []):
+                key = item['Key'][len(self.prefix):]
+                if ARTIFACT_ID_PATTERN.fullmatch(key):
+                    yield key, item['Size'], item['LastModified'].timestamp()
+
+
+class ArtifactStore:
+    """Stores generated artifacts under unique IDs and keeps them within size and age
+    limits.
+
+    An in-memory index tracks size and last access. Expired artifacts are removed first,
+    then the least recently used until the total fits.
+    """
+
+    def __init__(
+        self,
+        backend,
+        max_bytes=int(ARTIFACT_MAX_MB * 1024 * 1024),
+        max_age=ARTIFACT_MAX_AGE,
+    ):
+        self.backend = backend
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.index = {}
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def load(self):
+        # Pick up artifacts written before a restart so they still count towards the
+        # limits
+        for key, size, modified_at in self.backend.list():
+            with self.lock:
+                if key not in self.index:
+                    self._add(key, size, content_type_of(key), modified_at)
+        self.cleanup()
+
+    def put(self, data, extension):
+        artifact_id = f"{uuid.uuid4().hex}.{extension}"
+        content_type = content_type_of(artifact_id)
+        self.backend.put(artifact_id, data, content_type)
+        with self.lock:
+            self._add(artifact_id, len(data), content_type, time.time())
+        self.cleanup()
+        return artifact_id
+
+    def info(self, artifact_id):
+        """Returns the index entry for an artifact and marks it as recently used."""
+        with self.lock:
+            entry = self.index.get(artifact_id)
+            if entry is not None:
+                entry["accessed_at"] = time.time()
+            return entry
+
+    def exists(self, artifact_id):
+        return artifact_id in self.index
+
+    def path(self, artifact_id):
+        return self.backend.path(validate_artifact_id(artifact_id))
+
+    def get(self, artifact_id):
+        if self.info(artifact_id) is None:
+            return None
+        return self.backend.get(artifact_id)
+
+    def delete(self, artifact_ids):
+        with self.lock:
+            removed = [
+                artifact_id for artifact_id in artifact_ids if self._remove(artifact_id)
+            ]
+        for artifact_id in removed:
+            try:
+                self.backend.delete(artifact_id)
+            except Exception as e:
+                logger.error(
+                    "Error deleting artifact",
+                    extra={"artifact_id": artifact_id, "error": str(e)},
+                )
+        return removed
+
+    def cleanup(self):
+        now = time.time()
+        with self.lock:
+            expired = [
+                artifact_id for artifact_id, entry in self.index.items()
+                if now - entry["created_at"] > self.max_age
+            ]
+            total = self.size - sum(
+                self.index[artifact_id]["size"] for artifact_id in expired
+            )
+            evicted = []
+            if total > self.max_bytes:
+                expired_ids = set(expired)
+                candidates = sorted(
+                    (
+                        entry
+                        for artifact_id, entry in self.index.items()
+                        if artifact_id not in expired_ids
+                    ),
+                    key=lambda entry: entry["accessed_at"],
+                )
+                for entry in candidates:
+                    if total <= self.max_bytes:
+                        break
+                    evicted.append(entry["id"])
+                    total -= entry["size"]
+
+        removed = self.delete(expired + evicted)
+        if removed:
+            logger.info(
+                "Removed artifacts",
+                extra={
+                    "removed": len(removed),
+                    "expired": len(expired),
+                    "evicted": len(evicted),
+                },
+            )
+        return removed
+
+    def stats(self):
+        return {
+            "count": len(self.index),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "max_age": self.max_age,
+        }
+
+    def _add(self, artifact_id, size, content_type, created_at):
+        self.index[artifact_id] = {
+            "id": artifact_id,
+            "size": size,
+            "content_type": content_type,
+            "created_at": created_at,
+            "accessed_at": created_at,
+        }
+        self.size += size
+
+    def _remove(self, artifact_id):
+        entry = self.index.pop(artifact_id, None)
+        if entry is None:
+            return False
+        self.size -= entry["size"]
+        return True
+
+
+def create_artifact_store():
+    if ARTIFACT_BACKEND == "s3":
+        return ArtifactStore(S3ArtifactBackend())
+    return ArtifactStore(LocalArtifactBackend())
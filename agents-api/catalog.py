@@ -0,0 +1,142 @@
+import asyncio
+import os
+import random
+import time
+from collections import OrderedDict
+
+import httpx
+
+from logs import logger
+from telemetry import Counter, registry
+
+# Per-call timeout (seconds) for requests to the catalog API
+CATALOG_TIMEOUT = float(os.getenv("CATALOG_TIMEOUT", "10"))
+# Extra attempts after a failed call, and the base delay between them
+CATALOG_RETRIES = int(os.getenv("CATALOG_RETRIES", "3"))
+CATALOG_BACKOFF = float(os.getenv("CATALOG_BACKOFF", "0.25"))
+CATALOG_MAX_CONNECTIONS = int(os.getenv("CATALOG_MAX_CONNECTIONS", "20"))
+CATALOG_HTTP2 = os.getenv("CATALOG_HTTP2", "true").lower() == "true"
+
+# Seconds a cached agent, task or mission is used without asking the catalog API whether
+# it changed
+CATALOG_CACHE_TTL = float(os.getenv("CATALOG_CACHE_TTL", "5"))
+# Maximum number of catalog records kept in memory; 0 disables the cache
+CATALOG_CACHE_SIZE = int(os.getenv("CATALOG_CACHE_SIZE", "1024"))
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+CATALOG_CACHE_LOOKUPS = registry.register(
+    Counter(
+        "agent_api_catalog_cache_lookups_total",
+        "Catalog records looked up in the cache",
+        ["resource", "result"],
+    )
+)
+
+
+class CatalogClient:
+    """Long-lived, pooled HTTP client for the catalog API with retries and backoff."""
+
+    def __init__(
+        self, timeout=CATALOG_TIMEOUT, retries=CATALOG_RETRIES, backoff=CATALOG_BACKOFF
+    ):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.client = None
+
+    def open(self):
+        if self.client is None:
+            self.client = httpx.AsyncClient(
+                http2=CATALOG_HTTP2,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=CATALOG_MAX_CONNECTIONS,
+                    max_keepalive_connections=CATALOG_MAX_CONNECTIONS,
+                ),
+            )
+        return self.client
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    async def request(self, method, url, timeout=None, **kwargs):
+        client = self.open()
+        attempt = 0
+        while True:
+            try:
+                response = await client.request(
+                    method, url, timeout=timeout or self.timeout, **kwargs
+                )
+                if (
+                    response.status_code not in RETRYABLE_STATUS_CODES
+                    or attempt >= self.retries
+                ):
+                    return response
+                logger.warning(
+                    "Catalog API returned an error, retrying",
+                    extra={"status_code": response.status_code, "url": url},
+                )
+            except httpx.TransportError as e:
+                if attempt >= self.retries:
+                    raise
+                logger.warning(
+                    "Catalog API request failed, retrying",
+                    extra={"url": url, "error": str(e)},
+                )
+
+            attempt += 1
+            # Exponential backoff with full jitter
+            await asyncio.sleep(random.uniform(0, self.backoff * 2 ** attempt))
+
+    async def get(self, url, **kwargs):
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url, **kwargs):
+        return await self.request("POST", url, **kwargs)
+
+
+def item_version(item):
+    return item.get("version", {}).get("S")
+
+
+class CatalogCache:
+    """Size-bounded LRU of catalog records keyed by (api endpoint, resource, id).
+
+    Records younger than ttl are served without a request. Older ones are revalidated
+    against the version stamp the catalog Lambdas write, so an unchanged record costs a
+    small conditional fetch. Only used from the event loop, so it needs no lock.
+    """
+
+    def __init__(self, max_size=CATALOG_CACHE_SIZE, ttl=CATALOG_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        # key -> (record, time it was last confirmed current)
+        self.records = OrderedDict()
+
+    def lookup(self, key):
+        """Returns (record, fresh), or (None, False) when the record is not cached."""
+        entry = self.records.get(key)
+        if entry is None:
+            CATALOG_CACHE_LOOKUPS.inc(resource=key[1], result="miss")
+            return None, False
+        self.records.move_to_end(key)
+        record, confirmed_at = entry
+        fresh = time.monotonic() - confirmed_at < self.ttl
+        CATALOG_CACHE_LOOKUPS.inc(resource=key[1], result="hit" if fresh else "stale")
+        return record, fresh
+
+    def put(self, key, record):
+        # Also called with the cached record when the catalog API reports its version as
+        # current
+        if self.max_size <= 0:
+            return
+        self.records[key] = (record, time.monotonic())
+        self.records.move_to_end(key)
+        while len(self.records) > self.max_size:
+            self.records.popitem(last=False)
+
+    def invalidate(self, key):
+        self.records.pop(key, None)
@@ -0,0 +1,147 @@
+import json
+import os
+import threading
+import time
+
+import boto3
+
+from logs import logger
+
+# Seconds a resolved value is served before the background refresh re-reads SSM
+CONFIG_TTL = int(os.getenv("CONFIG_TTL", "300"))
+# JSON file of {setting name: value}, used when SSM and the environment have no value
+CONFIG_FILE = os.getenv("CONFIG_FILE", "./config.json")
+# Catalog API endpoints a request may select with apiEndpoint besides the configured one
+ALLOWED_API_ENDPOINTS = {
+    endpoint.strip().rstrip("/")
+    for endpoint in os.getenv("ALLOWED_API_ENDPOINTS", "").split(",")
+    if endpoint.strip()
+}
+# GetParameters accepts at most 10 names per call
+SSM_BATCH_SIZE = 10
+
+
+class ConfigError(Exception):
+    pass
+
+
+def read_config_file(path=CONFIG_FILE):
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        logger.error("Error reading config file", extra={"path": path, "error": str(e)})
+        return {}
+
+
+class SSMConfig:
+    """Settings resolved from SSM Parameter Store and served from memory, refreshed
+    every ttl seconds.
+
+    Each setting falls back to its last good SSM value, then an environment variable
+    named after it in upper case (api_endpoint -> API_ENDPOINT), then CONFIG_FILE.
+    """
+
+    def __init__(self, parameters, ttl=CONFIG_TTL, path=CONFIG_FILE):
+        # {setting name: SSM parameter name}
+        self.parameters = parameters
+        self.ttl = ttl
+        self.path = path
+        self.values = {}
+        self.sources = {}
+        self.loaded_at = None
+        self.client = None
+        self.lock = threading.Lock()
+
+    def fetch_parameters(self):
+        if self.client is None:
+            self.client = boto3.client("ssm")
+        names = list(self.parameters.values())
+        found = {}
+        for start in range(0, len(names), SSM_BATCH_SIZE):
+            response = self.client.get_parameters(
+                Names=names[start : start + SSM_BATCH_SIZE]
+            )
+            for parameter in response["Parameters"]:
+                found[parameter["Name"]] = parameter["Value"]
+            if response.get("InvalidParameters"):
+                logger.warning(
+                    "SSM parameters not found",
+                    extra={"parameters": ",".join(response["InvalidParameters"])},
+                )
+        return found
+
+    def load(self):
+        try:
+            found = self.fetch_parameters()
+        except Exception as e:
+            logger.error("Error fetching SSM parameters", extra={"error": str(e)})
+            found = {}
+        file_values = read_config_file(self.path)
+
+        with self.lock:
+            values = {}
+            sources = {}
+            for name, parameter in self.parameters.items():
+                candidates = [
+                    ("ssm", found.get(parameter)),
+                    (
+                        "cached",
+                        self.values.get(name)
+                        if self.sources.get(name) in ("ssm", "cached")
+                        else None,
+                    ),
+                    ("env", os.getenv(name.upper())),
+                    ("file", file_values.get(name)),
+                ]
+                source, value = next(
+                    ((source, value) for source, value in candidates if value),
+                    (None, None),
+                )
+                values[name] = value
+                sources[name] = source
+            self.values = values
+            self.sources = sources
+            self.loaded_at = time.monotonic()
+        return values
+
+    def refresh(self):
+        # Picks up rotated parameters on warm workers without a restart
+        return self.load()
+
+    def get(self, name):
+        if self.loaded_at is None:
+            self.load()
+        return self.values.get(name)
+
+    def require(self, name):
+        value = self.get(name)
+        if not value:
+            raise ConfigError(
+                f"Setting {name} is not configured in SSM ({self.parameters[name]}), "
+                f"the {name.upper()} environment variable or {self.path}"
+            )
+        return value
+
+    def api_endpoint(self, requested=None):
+        """The catalog API endpoint for a request, honoring its apiEndpoint when it is
+        allowed."""
+        configured = self.require("api_endpoint").rstrip("/")
+        if not requested:
+            return configured
+        requested = requested.rstrip("/")
+        # Only known endpoints, so a request cannot point the service at an arbitrary
+        # host
+        if requested != configured and requested not in ALLOWED_API_ENDPOINTS:
+            raise ValueError(
+                f"apiEndpoint {requested} is not an allowed catalog API endpoint"
+            )
+        return requested
+
+
+config = SSMConfig({
+    "api_endpoint": "/api/endpoint",
+    "llm_api": "/agent-api/endpoint",
+})
@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+# Maximum number of mission templates kept in memory; 0 disables the cache
+CREW_CACHE_SIZE = int(os.getenv("CREW_CACHE_SIZE", "32"))
+
+
+# Written by the catalog Lambdas on every save, even when nothing that shapes the crew
+# changed
+VERSION_ATTRIBUTES = ("version", "updated_at")
+
+
+def without_version(item):
+    return {key: value for key, value in item.items() if key not in VERSION_ATTRIBUTES}
+
+
+def mission_fingerprint(mission, agents, tasks):
+    # Only the fields that shape the crew take part in the key, so unrelated edits (e.g.
+    # results) keep it warm
+    definition = {
+        "process": mission['process']['S'].lower(),
+        "game": mission['game']['S'],
+        "depends_on": mission.get('depends_on'),
+        "agents": [without_version(agent) for agent in agents],
+        "tasks": [without_version(task) for task in tasks],
+    }
+    return hashlib.sha256(
+        json.dumps(definition, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+
+
+class CrewTemplate:
+    """Pre-built agents and tasks for a mission that are cloned into a fresh Crew for
+    every run.
+
+    tasks are in execution order; output_tasks (defaults to tasks) is the order outputs
+    are reported in.
+    """
+
+    def __init__(
+        self, agents, tasks, crew_kwargs, manager_agent=None, output_tasks=None
+    ):
+        self.agents = agents
+        self.tasks = tasks
+        self.crew_kwargs = crew_kwargs
+        self.manager_agent = manager_agent
+        self.output_tasks = output_tasks if output_tasks is not None else tasks
+
+    def instantiate(self, verbose=False):
+        from mission_crew import MissionCrew
+
+        # Agent.copy keeps the LLM binding and tool instances, so nothing expensive is
+        # rebuilt
+        cloned_agents = {}
+
+        def clone_agent(agent):
+            if agent is None:
+                return None
+            if id(agent) not in cloned_agents:
+                cloned = agent.copy()
+                # CrewAI's console output is chosen per run, so cached templates serve
+                # quiet and verbose runs
+                cloned.verbose = verbose
+                cloned_agents[id(agent)] = cloned
+            return cloned_agents[id(agent)]
+
+        task_mapping = {}
+        cloned_tasks = {}
+        tasks = []
+        for task in self.tasks:
+            agent = clone_agent(task.agent)
+            cloned_task = task.copy([agent] if agent else [], task_mapping)
+            # Task.copy resolves context by task key, which collides for identical
+            # tasks; rewire by identity
+            if task.context is not None:
+                cloned_task.context = [
+                    cloned_tasks[id(c)] for c in task.context if id(c) in cloned_tasks
+                ]
+            task_mapping[task.key] = cloned_task
+            cloned_tasks[id(task)] = cloned_task
+            tasks.append(cloned_task)
+
+        crew_kwargs = {**self.crew_kwargs, "verbose": verbose}
+        if self.manager_agent is not None:
+            crew_kwargs["manager_agent"] = clone_agent(self.manager_agent)
+
+        crew = MissionCrew(
+            agents=[clone_agent(agent) for agent in self.agents],
+            tasks=tasks,
+            **crew_kwargs,
+        )
+        return crew, [cloned_tasks[id(task)] for task in self.output_tasks]
+
+
+class CrewTemplateCache:
+    """Size-bounded LRU of CrewTemplates keyed by mission fingerprint."""
+
+    def __init__(self, max_size=CREW_CACHE_SIZE):
+        self.max_size = max_size
+        self.templates = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            template = self.templates.get(key)
+            if template is None:
+                self.misses += 1
+                return None
+            self.templates.move_to_end(key)
+            self.hits += 1
+            return template
+
+    def put(self, key, template):
+        if self.max_size <= 0:
+            return
+        with self.lock:
+            self.templates[key] = template
+            self.templates.move_to_end(key)
+            while len(self.templates) > self.max_size:
+                self.templates.popitem(last=False)
+
+    def stats(self):
+        return {
+            "size": len(self.templates),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
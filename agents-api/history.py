@@ -0,0 +1,139 @@
+import base64
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+
+from telemetry import record_span
+
+# Set to "false" to stop recording runs in the run history table
+RUN_HISTORY = os.getenv("RUN_HISTORY", "true").lower() == "true"
+
+# A run is stored as one DynamoDB item, which is limited to 400 KB; larger results are
+# compressed, and results that still do not fit are stored without their outputs
+HISTORY_RESULT_LIMIT = int(os.getenv("HISTORY_RESULT_LIMIT", str(350 * 1024)))
+# Keys holding the crew's outputs, which are dropped from results too large to store
+OUTPUT_FIELDS = ("results", "task_outputs")
+
+TOKEN_FIELDS = [
+    "total_tokens",
+    "prompt_tokens",
+    "completion_tokens",
+    "successful_requests",
+]
+
+
+def run_inputs_hash(mission_id, fingerprint, model):
+    # The mission definition fingerprint plus everything else that changes the crew's
+    # answer
+    payload = {"mission_id": mission_id, "definition": fingerprint, "model": model}
+    return hashlib.sha256(
+        json.dumps(payload, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+
+
+def token_summary(agent):
+    if agent is None:
+        return dict.fromkeys(TOKEN_FIELDS, 0)
+    return agent._token_process.get_summary().model_dump()
+
+
+class TaskMetrics:
+    """Collects each task's duration and token usage through Task callbacks.
+
+    Token usage is the growth of the task agent's counters since that agent's previous
+    task, so it is exact for sequential tasks and approximate when one agent runs tasks
+    concurrently.
+    """
+
+    def __init__(self, tasks, trace=None):
+        self.tasks = tasks
+        self.trace = trace
+        self.tokens = {}
+        self.snapshots = {}
+        self.lock = threading.Lock()
+
+    def on_task_complete(self, index, task_output=None):
+        task = self.tasks[index]
+        agent = task.agent
+        # Async tasks finish on threads CrewAI starts, so the trace is passed explicitly
+        record_span(
+            "task",
+            "",
+            task._execution_time or 0,
+            trace=self.trace,
+            index=index,
+            agent=agent.role if agent else None,
+        )
+        summary = token_summary(agent)
+        with self.lock:
+            previous = self.snapshots.get(id(agent), dict.fromkeys(TOKEN_FIELDS, 0))
+            self.tokens[index] = {
+                field: summary[field] - previous[field] for field in TOKEN_FIELDS
+            }
+            self.snapshots[id(agent)] = summary
+
+    def to_list(self):
+        return [
+            {"duration": task._execution_time, "token_usage": self.tokens.get(index)}
+            for index, task in enumerate(self.tasks)
+        ]
+
+
+def history_record(mission_id, run_id, inputs_hash, result):
+    return {
+        "mission_id": mission_id,
+        "run_id": run_id,
+        "inputs_hash": inputs_hash,
+        "created_at": int(time.time() * 1000),
+        "status": "completed",
+        "execution_time": result["execution_time"],
+        "result": encode_result(result),
+    }
+
+
+def encode_result(result, limit=HISTORY_RESULT_LIMIT):
+    """Returns the result in a form that fits in a run history item."""
+    encoded = json.dumps(result)
+    if len(encoded) <= limit:
+        return result
+
+    data = base64.b64encode(gzip.compress(encoded.encode("utf-8"))).decode("ascii")
+    if len(data) <= limit:
+        return {"encoding": "gzip", "data": data}
+
+    # Keeps the run's metrics; a truncated result is never returned as a cached answer
+    return {
+        **{key: value for key, value in result.items() if key not in OUTPUT_FIELDS},
+        "truncated": True,
+    }
+
+
+def decode_result(stored):
+    if stored.get("encoding") == "gzip":
+        return json.loads(gzip.decompress(base64.b64decode(stored["data"])))
+    return stored
+
+
+def parse_history_item(item):
+    return {
+        "mission_id": item["mission_id"]["S"],
+        "run_id": item["run_id"]["S"],
+        "inputs_hash": item["inputs_hash"]["S"],
+        "created_at": int(item["created_at"]["N"]),
+        "status": item["status"]["S"],
+        "execution_time": float(item["execution_time"]["N"]),
+        "result": decode_result(json.loads(item["result"]["S"])),
+    }
+
+
+def referenced_artifacts(result):
+    """Yields the artifact IDs of every image a stored result points at."""
+    for task_output in result.get("task_outputs", []):
+        output = json.loads(task_output)
+        images = output.get("images", [output] if output.get("type") == "image" else [])
+        for image in images:
+            if "id" in image:
+                yield image["id"]
@@ -0,0 +1,252 @@
+import copy
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+from crewai import LLM
+
+from telemetry import LLM_TOKENS, span
+
+# Opt-in: "sqlite" (persistent, shared by workers) or "memory"; anything else disables
+# the cache
+LLM_CACHE = os.getenv("LLM_CACHE", "").lower()
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "./cache/llm_responses.sqlite3")
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", "86400"))
+LLM_CACHE_MAX_MB = float(os.getenv("LLM_CACHE_MAX_MB", "256"))
+
+# LLM attributes that change the completion and therefore belong in the cache key
+KEY_PARAMS = [
+    "temperature", "top_p", "n", "stop", "max_tokens", "max_completion_tokens",
+    "presence_penalty", "frequency_penalty", "logit_bias", "response_format", "seed",
+]
+
+
+class ResponseCache(ABC):
+    """Backend interface for cached LLM responses."""
+
+    @abstractmethod
+    def get(self, key):
+        """Returns the cached response for key, or None."""
+
+    @abstractmethod
+    def set(self, key, value):
+        """Stores a response under key."""
+
+
+class MemoryResponseCache(ResponseCache):
+    def __init__(
+        self, ttl=LLM_CACHE_TTL, max_bytes=int(LLM_CACHE_MAX_MB * 1024 * 1024)
+    ):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            value, created_at = entry
+            if time.time() - created_at > self.ttl:
+                self._remove(key)
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = (value, time.time())
+            self.size += len(value)
+            while self.size > self.max_bytes and self.entries:
+                self._remove(next(iter(self.entries)))
+
+    def _remove(self, key):
+        value, _ = self.entries.pop(key)
+        self.size -= len(value)
+
+
+class SQLiteResponseCache(ResponseCache):
+    """Disk-backed cache with TTL expiry and least-recently-used eviction by size."""
+
+    def __init__(
+        self,
+        path=LLM_CACHE_PATH,
+        ttl=LLM_CACHE_TTL,
+        max_bytes=int(LLM_CACHE_MAX_MB * 1024 * 1024),
+    ):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+            "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS responses_accessed_at "
+            "ON responses (accessed_at)"
+        )
+        self.connection.commit()
+
+    def get(self, key):
+        now = time.time()
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl:
+                self.connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.connection.commit()
+                return None
+            self.connection.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self.connection.commit()
+            return row[0]
+
+    def set(self, key, value):
+        now = time.time()
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value), now, now),
+            )
+            self.connection.execute(
+                "DELETE FROM responses WHERE created_at < ?", (now - self.ttl,)
+            )
+            self._evict()
+            self.connection.commit()
+
+    def _evict(self):
+        total = self.connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()[0]
+        while total > self.max_bytes:
+            key, size = self.connection.execute(
+                "SELECT key, size FROM responses ORDER BY accessed_at LIMIT 1"
+            ).fetchone()
+            self.connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+
+
+def create_response_cache():
+    if LLM_CACHE == "sqlite":
+        return SQLiteResponseCache()
+    if LLM_CACHE == "memory":
+        return MemoryResponseCache()
+    return None
+
+
+class CacheStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def record(self, hit):
+        with self.lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def to_dict(self):
+        return {"hits": self.hits, "misses": self.misses}
+
+
+class CachedLLM(LLM):
+    """LLM that answers repeated prompts from a ResponseCache instead of calling the
+    model again."""
+
+    def __init__(self, *args, cache=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cache = cache
+        self.stats = CacheStats()
+        # RunTrace of the run this copy belongs to; set by telemetry.attach_run_trace
+        self.run_trace = None
+
+    def cache_key(self, messages):
+        payload = {
+            "model": self.model,
+            "params": {name: getattr(self, name, None) for name in KEY_PARAMS},
+            "messages": messages,
+        }
+        return hashlib.sha256(
+            json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+
+    def call(self, messages, callbacks=None):
+        with span("llm.call", self.model, trace=self.run_trace) as attributes:
+            before = token_counts(callbacks)
+            response = self.cached_call(messages, callbacks, attributes)
+            after = token_counts(callbacks)
+            if before is not None and after is not None:
+                attributes["input_tokens"] = after[0] - before[0]
+                attributes["output_tokens"] = after[1] - before[1]
+                LLM_TOKENS.inc(
+                    attributes["input_tokens"], model=self.model, type="input"
+                )
+                LLM_TOKENS.inc(
+                    attributes["output_tokens"], model=self.model, type="output"
+                )
+            return response
+
+    def cached_call(self, messages, callbacks, attributes):
+        if self.cache is None:
+            return super().call(messages, callbacks)
+
+        key = self.cache_key(messages)
+        cached = self.cache.get(key)
+        self.stats.record(cached is not None)
+        attributes["cache_hit"] = cached is not None
+        if cached is not None:
+            return cached
+
+        response = super().call(messages, callbacks)
+        if response:
+            self.cache.set(key, response)
+        return response
+
+
+def token_counts(callbacks):
+    # CrewAI passes the agent's TokenCalcHandler; the growth of its counters is this
+    # call's usage
+    for callback in callbacks or []:
+        process = getattr(callback, "token_cost_process", None)
+        if process is not None:
+            return process.prompt_tokens, process.completion_tokens
+    return None
+
+
+def attach_run_stats(crew):
+    """Points every cached LLM in the crew at one fresh CacheStats so hits and misses
+    are counted per run."""
+    stats = CacheStats()
+
+    for agent in [*crew.agents, crew.manager_agent]:
+        if agent is not None and isinstance(agent.llm, CachedLLM):
+            agent.llm.stats = stats
+
+    # CrewAI builds the default manager from manager_llm during kickoff, so give this
+    # run its own copy
+    if isinstance(crew.manager_llm, CachedLLM):
+        crew.manager_llm = copy.copy(crew.manager_llm)
+        crew.manager_llm.stats = stats
+
+    return stats
@@ -0,0 +1,141 @@
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import os
+import queue
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+from telemetry import current_trace
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# "json" for one object per line (CloudWatch Logs Insights), "text" for local
+# development
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+# Longest message or field value written; large payloads such as task outputs are cut to
+# this
+LOG_MAX_FIELD = int(os.getenv("LOG_MAX_FIELD", "2000"))
+
+# Per-run level set from the request, e.g. "debug" for one mission without raising it
+# for every run
+run_log_level = contextvars.ContextVar("run_log_level", default=None)
+
+
+def parse_level(name, default=None):
+    if not name:
+        return default
+    level = logging.getLevelName(str(name).upper())
+    return level if isinstance(level, int) else default
+
+
+def truncate(value):
+    if not isinstance(value, str):
+        value = str(value)
+    if len(value) <= LOG_MAX_FIELD:
+        return value
+    return f"{value[:LOG_MAX_FIELD]}... [{len(value) - LOG_MAX_FIELD} more characters]"
+
+
+class RunLogger(logging.Logger):
+    """Logger whose threshold can be lowered for a single run through run_log_level."""
+
+    def isEnabledFor(self, level):
+        override = run_log_level.get()
+        if override is not None:
+            return level >= override
+        return super().isEnabledFor(level)
+
+
+class CorrelationFilter(logging.Filter):
+    # Threads CrewAI starts itself have no run context; callers there pass run_id in
+    # extra
+    def filter(self, record):
+        trace = current_trace.get()
+        if not hasattr(record, "run_id"):
+            record.run_id = trace.run_id if trace is not None else None
+        if not hasattr(record, "mission_id"):
+            record.mission_id = trace.mission_id if trace is not None else None
+        return True
+
+
+class BackgroundQueueHandler(QueueHandler):
+    """Hands records to the listener thread; formatting and writing happen off the
+    request path."""
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+RESERVED = set(vars(logging.makeLogRecord({}))) | {"message", "run_id", "mission_id"}
+
+
+class StructuredFormatter(logging.Formatter):
+    def format(self, record):
+        fields = {
+            key: value for key, value in vars(record).items() if key not in RESERVED
+        }
+        if LOG_FORMAT == "text":
+            line = (
+                f"{self.formatTime(record)} {record.levelname} "
+                f"[{record.run_id or '-'}] {truncate(record.msg)}"
+            )
+            if fields:
+                line += " " + " ".join(
+                    f"{key}={truncate(value)}" for key, value in fields.items()
+                )
+            if record.exc_text:
+                line += "\n" + record.exc_text
+            return line
+
+        entry = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created))
+            + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": truncate(record.msg),
+            "run_id": record.run_id,
+            "mission_id": record.mission_id,
+        }
+        for key, value in fields.items():
+            entry[key] = (
+                value
+                if isinstance(value, (int, float, bool)) or value is None
+                else truncate(value)
+            )
+        if record.exc_text:
+            entry["exception"] = truncate(record.exc_text)
+        return json.dumps(entry)
+
+
+def create_logger(name="agents-api"):
+    logger = RunLogger(name, parse_level(LOG_LEVEL, logging.INFO))
+    records = queue.SimpleQueue()
+    handler = BackgroundQueueHandler(records)
+    handler.addFilter(CorrelationFilter())
+    logger.addHandler(handler)
+
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(StructuredFormatter())
+    listener = QueueListener(records, output)
+    listener.start()
+    # Flush whatever is still queued when the worker exits
+    atexit.register(listener.stop)
+    return logger, listener
+
+
+logger, log_listener = create_logger()
+
+
+def is_verbose():
+    """Whether CrewAI's own step-by-step console output should be on for the current
+    run."""
+    return logger.isEnabledFor(logging.DEBUG)
@@ -4,32 +4,131 @@ import os
 load_dotenv()
 
 from fastapi import FastAPI, Request, Response, HTTPException
-from fastapi.responses import JSONResponse
+from starlette.background import BackgroundTask
+from fastapi.responses import (
+    JSONResponse,
+    StreamingResponse,
+    FileResponse,
+    PlainTextResponse,
+)
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.testclient import TestClient
 import httpx
 import json
-from crewai import Agent, Task, Crew, LLM
+import logging
 from textwrap import dedent
-import boto3
 import time
-from tools import ImageGeneratorTool, TimeoutCodeInterpreterTool
-import os
+import asyncio
+from contextlib import asynccontextmanager
+from functools import partial
+from runs import RunStore, run_status
+from catalog import CatalogCache, CatalogClient, item_version
+from crew_cache import CrewTemplate, CrewTemplateCache, mission_fingerprint
+from scheduling import get_task_dependencies, dependency_levels, execution_plan
+from artifacts import ARTIFACT_CLEANUP_INTERVAL, create_artifact_store
+from sandbox import get_sandbox_pool, shutdown_sandbox_pool
+from history import (
+    RUN_HISTORY,
+    TaskMetrics,
+    history_record,
+    parse_history_item,
+    referenced_artifacts,
+    run_inputs_hash,
+)
+from telemetry import Gauge, RunTrace, attach_run_trace, current_trace, registry, span
+from logs import is_verbose, logger, parse_level, run_log_level
+from admission import AdmissionController, AdmissionRejected, tenant_of
+from config import ConfigError, config
+import importlib
+import threading
+import uuid
 
-app = FastAPI()
-ssm = boto3.client('ssm')
+# Generated images are removed once they are too old or, least recently used first, when
+# the store is full
+artifact_store = create_artifact_store()
+run_store = RunStore()
+catalog_client = CatalogClient()
+# Agents, tasks and missions change rarely, so hot missions are assembled from memory
+catalog_cache = CatalogCache()
+crew_templates = CrewTemplateCache()
+# Bounds runs queued for the run store's slots, overall and per tenant
+admission = AdmissionController()
+# Strong references to in-flight run history writes
+history_jobs = set()
 
-def get_endpoint(param_name):
-    try:
-        response = ssm.get_parameter(Name=param_name)
-        return response['Parameter']['Value']
-    except Exception as e:
-        print(f"Error fetching {param_name}: {e}")
-        return None
+registry.register(
+    Gauge(
+        "agent_api_runs_admitted",
+        "Runs admitted and not yet finished",
+        lambda: admission.active,
+    )
+)
+registry.register(
+    Gauge(
+        "agent_api_run_queue_depth",
+        "Crews waiting for a free run slot",
+        lambda: run_store.waiting,
+    )
+)
+registry.register(
+    Gauge(
+        "agent_api_artifact_bytes",
+        "Bytes held by the artifact store",
+        lambda: artifact_store.size,
+    )
+)
+registry.register(
+    Gauge(
+        "agent_api_crew_templates",
+        "Compiled crew templates cached",
+        lambda: len(crew_templates.templates),
+    )
+)
+registry.register(
+    Gauge(
+        "agent_api_catalog_records",
+        "Agents, tasks and missions cached",
+        lambda: len(catalog_cache.records),
+    )
+)
 
-# Get API endpoints from environment variables
-API_ENDPOINT = get_endpoint('/api/endpoint')
-LLM_API = get_endpoint('/agent-api/endpoint')
+async def cleanup_artifacts():
+    while True:
+        await asyncio.sleep(ARTIFACT_CLEANUP_INTERVAL)
+        try:
+            run_store.prune()
+            await asyncio.to_thread(artifact_store.cleanup)
+        except Exception as e:
+            logger.error("Artifact cleanup failed", extra={"error": str(e)})
+
+async def refresh_config():
+    # Rotated SSM parameters reach warm workers within one TTL
+    while True:
+        await asyncio.sleep(config.ttl)
+        await asyncio.to_thread(config.refresh)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    catalog_client.open()
+    await asyncio.to_thread(config.load)
+    await asyncio.to_thread(artifact_store.load)
+    # Start the code sandbox workers now so the first CodeInterpreter call does not wait
+    # for them
+    await asyncio.to_thread(get_sandbox_pool)
+    cleanup = asyncio.create_task(cleanup_artifacts())
+    config_refresh = asyncio.create_task(refresh_config())
+    # Import CrewAI in the background so startup does not wait for it; a mission
+    # arriving earlier imports it on build_crew's thread, so the event loop keeps
+    # serving health checks either way
+    warmup = asyncio.create_task(asyncio.to_thread(import_crew_modules))
+    yield
+    warmup.cancel()
+    config_refresh.cancel()
+    cleanup.cancel()
+    await catalog_client.close()
+    run_store.shutdown()
+    shutdown_sandbox_pool()
+
+app = FastAPI(lifespan=lifespan)
 
 # Define specific allowed origins
 origins = [
@@ -43,107 +142,191 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE"],
     allow_headers=["Content-Type", "Authorization"],
+    # Lets the UI read how long to back off after a 429
+    expose_headers=["Retry-After"],
 )
 
-claude_haiku = LLM(
-    model="bedrock/anthropic.claude-3-haiku-20240307-v1:0",
-    temperature=0.5
-)
+LLM_MODEL = "bedrock/anthropic.claude-3-haiku-20240307-v1:0"
 
-image_generator = ImageGeneratorTool(result_as_answer=True)
+# CrewAI, crewai_tools, LangChain and Pillow take seconds to import, so they load on
+# first use. First use is always in build_crew, which runs off the event loop, possibly
+# for two missions at once
+claude_haiku = None
+image_generator = None
+crew_modules_lock = threading.Lock()
 
-os.makedirs("./images", exist_ok=True)
+def import_crew_modules():
+    importlib.import_module("llm_cache")
+    importlib.import_module("mission_crew")
+    importlib.import_module("tools")
 
-async def fetch_mission(id):
-    print(f"Fetching API Endpoint: {API_ENDPOINT}")
-    print(f"Fetching LLM Endpoint: {LLM_API}")
-    async with httpx.AsyncClient() as client:
-        response = await client.get(f"{API_ENDPOINT}/missions")
-        response.raise_for_status()
-        missions = response.json()['body']
-        missions_list = json.loads(missions)
+def get_llm():
+    global claude_haiku
+    with crew_modules_lock:
+        if claude_haiku is None:
+            from llm_cache import CachedLLM, create_response_cache
+            claude_haiku = CachedLLM(
+                model=LLM_MODEL, temperature=0.5, cache=create_response_cache()
+            )
+        return claude_haiku
 
-        mission = None
-        for m in missions_list:
-            if m['id']['S'] == id:
-                mission = m
-                break
+def get_image_generator():
+    global image_generator
+    with crew_modules_lock:
+        if image_generator is None:
+            from tools import ImageGeneratorTool, ImageCache
+            image_generator = ImageGeneratorTool(
+                result_as_answer=True,
+                artifact_store=artifact_store,
+                image_cache=ImageCache(artifact_store)
+            )
+        return image_generator
+
+def read_catalog_body(response):
+    # Catalog Lambdas sit behind a non-proxy integration, so their status code is part
+    # of the payload
+    response.raise_for_status()
+    payload = response.json()
+    if payload.get('statusCode', 200) != 200:
+        raise ValueError(
+            f"Catalog API returned {payload.get('statusCode')}: {payload.get('body')}"
+        )
+    return json.loads(payload['body'])
+
+async def fetch_mission(id, api_endpoint):
+    key = (api_endpoint, "missions", id)
+    cached, fresh = catalog_cache.lookup(key)
+    if fresh:
+        return cached
+
+    # A cached mission with a version stamp is revalidated with a conditional fetch
+    version = item_version(cached) if cached is not None else None
+    logger.debug(
+        "Fetching mission",
+        extra={"mission_id": id, "api_endpoint": api_endpoint, "version": version},
+    )
+    with span(
+        "catalog.fetch", "missions", mission_id=id, conditional=version is not None
+    ):
+        response = await catalog_client.get(
+            f"{api_endpoint}/missions/{id}",
+            params={"version": version} if version else None,
+        )
+    response.raise_for_status()
+    status_code = response.json().get('statusCode')
+    if status_code == 304:
+        catalog_cache.put(key, cached)
+        return cached
+    if status_code == 404:
+        catalog_cache.invalidate(key)
+        error_message = f"No mission found with ID: {id}"
+        logger.warning(error_message)
+        raise ValueError(error_message)
+
+    mission = read_catalog_body(response)
+    catalog_cache.put(key, mission)
+    return mission
+
+async def fetch_items_by_ids(resource, ids, api_endpoint):
+    items_by_id = {}
+    stale = {}
+    for id in ids:
+        cached, fresh = catalog_cache.lookup((api_endpoint, resource, id))
+        if fresh:
+            items_by_id[id] = cached
+        elif cached is not None and item_version(cached):
+            stale[id] = cached
+
+    missing = [id for id in ids if id not in items_by_id]
+    if not missing:
+        return items_by_id
+
+    request = {"ids": missing}
+    if stale:
+        # Items still at these versions come back as IDs only
+        request["versions"] = {id: item_version(item) for id, item in stale.items()}
+    with span("catalog.fetch", resource, count=len(missing), cached=len(items_by_id)):
+        response = await catalog_client.post(
+            f"{api_endpoint}/{resource}/batch-get", json=request
+        )
+    body = read_catalog_body(response)
+
+    # A catalog API without conditional fetches returns a plain list of items
+    changed = body["items"] if isinstance(body, dict) else body
+    for id in (body.get("unchanged", []) if isinstance(body, dict) else []):
+        catalog_cache.put((api_endpoint, resource, id), stale[id])
+        items_by_id[id] = stale[id]
+    for item in changed:
+        catalog_cache.put((api_endpoint, resource, item['id']['S']), item)
+        items_by_id[item['id']['S']] = item
+
+    # Deleted items are no longer returned and must not be served from the cache either
+    for id in missing:
+        if id not in items_by_id:
+            catalog_cache.invalidate((api_endpoint, resource, id))
+
+    return items_by_id
+
+async def fetch_mission_tasks(tasks, api_endpoint):
+    task_ids = [task['S'] for task in tasks['L']]
+    tasks_by_id = await fetch_items_by_ids("tasks", task_ids, api_endpoint)
+
+    # Keep the mission's task order, which drives sequential execution
+    mission_tasks = [
+        tasks_by_id[task_id] for task_id in task_ids if task_id in tasks_by_id
+    ]
 
-        if mission:
-            return mission
-        else:
-            error_message = f"No mission found with ID: {id}"
-            print(error_message)
-            raise ValueError(error_message)
-
-async def fetch_mission_tasks(tasks):
-    
-    mission_tasks = []
-
-    async with httpx.AsyncClient() as client:
-        print(f"Fetching API Endpoint IN FETCH MISSIONS TASKS: {API_ENDPOINT}")
-        print(f"Fetching LLM Endpoint: {LLM_API}")
-        response = await client.get(f"{API_ENDPOINT}/tasks")
-        response.raise_for_status()
-        tasks_data = response.json()['body']
-        tasks_list = json.loads(tasks_data)
-
-        for task in tasks['L']:
-            for t in tasks_list:
-                if t['id']['S'] == task['S']:
-                    mission_tasks.append(t)
-
-    print(f"Mission tasks: {mission_tasks}") 
     return mission_tasks
 
 
-async def fetch_mission_agents(agents):
-    mission_agents = []
+async def fetch_mission_agents(agents, api_endpoint):
+    agent_ids = [agent['S'] for agent in agents['L']]
+    agents_by_id = await fetch_items_by_ids("agents", agent_ids, api_endpoint)
 
-    async with httpx.AsyncClient() as client:
-        print(f"Fetching API Endpoint in MISSIONS AGENTS: {API_ENDPOINT}")
-        print(f"Fetching LLM Endpoint: {LLM_API}")
-        response = await client.get(f"{API_ENDPOINT}/agents")
-        response.raise_for_status()
-        agents_data = response.json()['body']
-        agents_list = json.loads(agents_data)
+    return [
+        agents_by_id[agent_id]
+        for agent_id in dict.fromkeys(agent_ids)
+        if agent_id in agents_by_id
+    ]
 
-        for a in agents_list:
-            for agent in agents['L']:
-                if a['id']['S'] == agent['S']:
-                    mission_agents.append(a)
-        
-    return mission_agents
+def format_tools(agent):
+    tools = []
+    if 'tools' in agent and agent['tools']['L']:
+        for tool in agent['tools']['L']:
+            if tool['S'] == 'ImageGenerator':
+                tools.append(get_image_generator())
+            elif tool['S'] == 'CodeInterpreter':
+                from tools import TimeoutCodeInterpreterTool
+                tools.append(TimeoutCodeInterpreterTool(timeout=180))
+    return tools
+
+def format_agent(agent, llm):
+    from mission_crew import MissionAgent
+    return MissionAgent(
+        role=agent['role']['S'],
+        goal=agent['goal']['S'],
+        backstory=dedent(agent['backstory']['S']),
+        allow_delegation=agent['allow_delegation']['BOOL'],
+        verbose=False,
+        llm=llm,
+        tools=format_tools(agent)
+    )
 
 def format_agents(agents, llm, mission=None):
-    formatted_agents = []
-    tools = []  # Initialize tools list here
+    # One Agent per agent ID; tasks reuse these instances so per-agent state stays
+    # shared across the run
+    formatted_agents = {}
 
     for agent in agents:
         try:
-            if 'tools' in agent and agent['tools']['L']:
-                tools = []  # Reset tools for each agent
-                for tool in agent['tools']['L']:
-                    if tool['S'] == 'ImageGenerator':
-                            tools.append(image_generator)
-                    elif tool['S'] == 'CodeInterpreter':
-                        tools.append(TimeoutCodeInterpreterTool(timeout=180))
-
-            formatted_agent = Agent(
-                role=agent['role']['S'],
-                goal=agent['goal']['S'],
-                backstory=dedent(agent['backstory']['S']),
-                allow_delegation=agent['allow_delegation']['BOOL'],
-                verbose=True,
-                llm=llm,
-                tools=tools 
-            )
-            formatted_agents.append(formatted_agent)
+            formatted_agents[agent['id']['S']] = format_agent(agent, llm)
         except KeyError as e:
-            print(f"KeyError: Missing key {e} in agent data")
+            logger.error("Missing key in agent data", extra={"key": str(e)})
         except Exception as e:
-            print(f"An error occurred while processing agent: {e}")
-            
+            logger.error(
+                "An error occurred while processing agent", extra={"error": str(e)}
+            )
+
     return formatted_agents
 
 def get_manager_agent(agents):
@@ -152,66 +335,128 @@ def get_manager_agent(agents):
             return agent
     return None
 
-def get_formatted_agent(id, agents, llm):
-    agent = None
-    for agent in agents:
-        if agent['id']['S'] == id:
-            agent = agent
-            break
-    
+def format_manager_agent(agent, llm):
+    # CrewAI rewrites the manager's tools with delegation tools, so it gets its own
+    # instance
     try:
-        tools = []  # Initialize tools list
-        if 'tools' in agent and agent['tools']['L']:
-            for tool in agent['tools']['L']:
-                if tool['S'] == 'ImageGenerator':
-                    tools.append(image_generator)
-                elif tool['S'] == 'CodeInterpreter':
-                    tools.append(TimeoutCodeInterpreterTool(timeout=180))
-
-        formatted_agent = Agent(
-            role=agent['role']['S'],
-            goal=agent['goal']['S'],
-            backstory=dedent(agent['backstory']['S']),
-            allow_delegation=agent['allow_delegation']['BOOL'],
-            verbose=True,
-            tools=tools,
-            llm=llm,
-        )
-
-        return formatted_agent
+        return format_agent(agent, llm)
     except KeyError as e:
-        print(f"KeyError: Missing key {e} in agent data")
+        logger.error("Missing key in agent data", extra={"key": str(e)})
     except Exception as e:
-        print(f"An error occurred while processing agent: {e}")
+        logger.error(
+            "An error occurred while processing agent", extra={"error": str(e)}
+        )
+
+def format_task(task, agent, game, context, async_execution=False):
+    from crewai import Task
+    return Task(
+        description=dedent(
+            task['description']['S']
+            + "\n This is one of the tasks for the following project: "
+            + game
+        ),
+        expected_output=dedent(task['expected_output']['S']),
+        agent=agent,
+        verbose=False,
+        context=context, 
+        tools=agent.tools,
+        async_execution=async_execution
+    )
 
-def format_tasks(tasks, agents, game, llm):
+def format_tasks(tasks, formatted_agents, game, dependencies=None, allow_async=True):
     formatted_tasks = []
+
+    if dependencies:
+        return format_dependent_tasks(
+            tasks, formatted_agents, game, dependencies, allow_async
+        )
+
+    # Without declared dependencies every task depends on all of the tasks before it
     for task in tasks:
         try:
-            task_id = task['id']['S'] 
-            agent = get_formatted_agent(task['agent']['S'], agents, llm)
+            agent = formatted_agents[task['agent']['S']]
             
-            formatted_task = Task(
-                description=dedent(task['description']['S'] + "\n This is one of the tasks for the following project: " + game),
-                expected_output=dedent(task['expected_output']['S']),
-                agent=agent,
-                verbose=True,
-                context=formatted_tasks, 
-                tools=agent.tools
-            )
+            formatted_task = format_task(task, agent, game, context=formatted_tasks)
             formatted_tasks.append(formatted_task)
                         
         except KeyError as e:
-            print(f"KeyError: Missing key {e} in task data")
+            logger.error("Missing key in task data", extra={"key": str(e)})
         except Exception as e:
-            print(f"An error occurred while processing task: {e}")
+            logger.error(
+                "An error occurred while processing task", extra={"error": str(e)}
+            )
+
+    return formatted_tasks, formatted_tasks
 
-    return formatted_tasks
+def format_dependent_tasks(
+    tasks, formatted_agents, game, dependencies, allow_async=True
+):
+    # Returns the tasks in execution order and, separately, in mission order for
+    # reporting outputs
+    from mission_crew import JoinTask
+
+    tasks_by_id = {task['id']['S']: task for task in tasks}
+    task_agents = {
+        task_id: task['agent']['S']
+        for task_id, task in tasks_by_id.items()
+        if 'agent' in task
+    }
+    plan = execution_plan(
+        dependency_levels(list(tasks_by_id), dependencies), task_agents
+    )
+
+    formatted_by_id = {}
+    formatted_tasks = []
+    running = []
+    for task_id, async_execution in plan:
+        try:
+            if task_id is None:
+                # Without async tasks to wait for there is nothing to join
+                if allow_async and running:
+                    formatted_tasks.append(
+                        JoinTask(agent=running[-1].agent, context=running)
+                    )
+                running = []
+                continue
+
+            task = tasks_by_id[task_id]
+            agent = formatted_agents[task['agent']['S']]
+            # An empty context must stay empty, or the task would see every earlier
+            # output
+            context = [
+                formatted_by_id[d]
+                for d in dependencies.get(task_id, [])
+                if d in formatted_by_id
+            ]
+
+            formatted_task = format_task(
+                task,
+                agent,
+                game,
+                context=context,
+                async_execution=async_execution and allow_async,
+            )
+            formatted_by_id[task_id] = formatted_task
+            formatted_tasks.append(formatted_task)
+            if formatted_task.async_execution:
+                running.append(formatted_task)
+
+        except KeyError as e:
+            logger.error("Missing key in task data", extra={"key": str(e)})
+        except Exception as e:
+            logger.error(
+                "An error occurred while processing task", extra={"error": str(e)}
+            )
+
+    return formatted_tasks, [
+        formatted_by_id[task_id]
+        for task_id in tasks_by_id
+        if task_id in formatted_by_id
+    ]
 
 def is_json(my_string):
     try:
         json_object = json.loads(my_string)
-        print(json_object)
         if not isinstance(json_object, (dict, list)):
             return False
         return True
@@ -223,108 +468,575 @@ def is_json(my_string):
 def read_root():
     return {"status": "ok", "message": "ok"}
 
+@app.get("/metrics")
+def metrics():
+    # Prometheus text exposition of span histograms, token counters and worker gauges
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/images/{image_id}")
+async def get_image(image_id: str):
+    info = artifact_store.info(image_id)
+    if info is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+
+    # Image IDs are never reused, so clients and CloudFront may cache them indefinitely
+    headers = {"Cache-Control": "public, max-age=31536000, immutable"}
+
+    path = artifact_store.path(image_id)
+    if path is not None:
+        # FileResponse adds ETag/Last-Modified and answers Range requests
+        return FileResponse(path, media_type=info["content_type"], headers=headers)
+
+    data = await asyncio.to_thread(artifact_store.get, image_id)
+    if data is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    return Response(
+        content=data,
+        media_type=info["content_type"],
+        headers={**headers, "ETag": f'"{image_id}"'},
+    )
+
+def build_crew_template(mission, agents, tasks, llm):
+    formatted_agents = format_agents(agents, llm, mission)
+    # The hierarchical manager re-targets its tools per task, so only sequential crews
+    # run tasks concurrently
+    formatted_tasks, output_tasks = format_tasks(
+        tasks,
+        formatted_agents,
+        mission['game']['S'],
+        dependencies=get_task_dependencies(mission, tasks),
+        allow_async=mission['process']['S'].lower() != 'hierarchical',
+    )
+    logger.debug("Tasks and agents formatted", extra={
+        "process_type": mission['process']['S'].lower(),
+        "agents": len(formatted_agents),
+        "tasks": len(formatted_tasks),
+    })
+
+    crew_kwargs = {
+        "process": mission['process']['S'].lower(),
+        "verbose": False,
+    }
+    manager_agent_formatted = None
+
+    if (mission['process']['S'].lower() == 'hierarchical'):
+        manager_agent = get_manager_agent(agents)
+
+        if manager_agent is None:
+            crew_kwargs["manager_llm"] = llm
+        else:
+            manager_agent_formatted = format_manager_agent(manager_agent, llm)
+
+    return CrewTemplate(
+        list(formatted_agents.values()),
+        formatted_tasks,
+        crew_kwargs,
+        manager_agent_formatted,
+        output_tasks,
+    )
+
+async def load_mission(id, api_endpoint):
+    mission = await fetch_mission(id, api_endpoint)
+
+    # Tasks and agents only depend on the mission, so fetch them concurrently
+    tasks, agents = await asyncio.gather(
+        fetch_mission_tasks(mission['tasks'], api_endpoint),
+        fetch_mission_agents(mission['agents'], api_endpoint),
+    )
+    logger.info("Mission loaded", extra={"tasks": len(tasks), "agents": len(agents)})
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "Mission definition",
+            extra={
+                "mission": json.dumps(mission),
+                "tasks": json.dumps(tasks),
+                "agents": json.dumps(agents),
+            },
+        )
+
+    fingerprint = mission_fingerprint(mission, agents, tasks)
+    return {
+        "id": id,
+        "api_endpoint": api_endpoint,
+        "mission": mission,
+        "agents": agents,
+        "tasks": tasks,
+        "fingerprint": fingerprint,
+        "inputs_hash": run_inputs_hash(id, fingerprint, LLM_MODEL),
+    }
+
+def build_crew(definition):
+    # Blocking: compiling a template imports CrewAI on first use, so callers run it off
+    # the event loop
+    # Unchanged missions reuse their compiled agents and tasks; every run gets its own
+    # clone
+    template = crew_templates.get(definition["fingerprint"])
+    with span(
+        "crew.build",
+        "cached" if template is not None else "compiled",
+        mission_id=definition["id"],
+    ):
+        if template is None:
+            template = build_crew_template(
+                definition["mission"],
+                definition["agents"],
+                definition["tasks"],
+                get_llm(),
+            )
+            crew_templates.put(definition["fingerprint"], template)
+        else:
+            logger.debug("Reusing cached crew")
+
+        return template.instantiate(verbose=is_verbose())
+
+async def fetch_cached_run(inputs_hash, api_endpoint):
+    """Returns the newest recorded result for this exact mission definition, or None."""
+    with span("catalog.fetch", "runs"):
+        response = await catalog_client.get(
+            f"{api_endpoint}/runs", params={"inputs_hash": inputs_hash, "limit": 1}
+        )
+    items = read_catalog_body(response)
+    if not items:
+        return None
+
+    cached = parse_history_item(items[0])
+    # Results too large for the run history were stored without their outputs
+    if cached["result"].get("truncated"):
+        return None
+    # Images of old runs may have been evicted; a result pointing at missing images is
+    # not reusable
+    if not all(
+        artifact_store.exists(artifact_id)
+        for artifact_id in referenced_artifacts(cached["result"])
+    ):
+        return None
+    return cached
+
+async def record_run(id, run_id, inputs_hash, result, api_endpoint):
+    try:
+        with span("catalog.write", "runs"):
+            response = await catalog_client.post(
+                f"{api_endpoint}/runs",
+                json=history_record(id, run_id, inputs_hash, result),
+            )
+        read_catalog_body(response)
+    except Exception as e:
+        logger.error(
+            "Error recording run",
+            extra={"run_id": run_id, "mission_id": id, "error": str(e)},
+        )
+
+def schedule_record_run(definition, run_id, result):
+    # History writes never delay the response
+    if not RUN_HISTORY:
+        return
+    job = asyncio.ensure_future(
+        record_run(
+            definition["id"],
+            run_id,
+            definition["inputs_hash"],
+            result,
+            definition["api_endpoint"],
+        )
+    )
+    history_jobs.add(job)
+    job.add_done_callback(history_jobs.discard)
+
+def format_image(image):
+    # Only a reference goes into the result; clients fetch the bytes from GET
+    # /images/{id}
+    formatted = {
+        "id": image["image_id"],
+        "url": f"/images/{image['image_id']}"
+    }
+    if image.get("thumbnail_id"):
+        formatted["thumbnail_url"] = f"/images/{image['thumbnail_id']}"
+    if image.get("seed") is not None:
+        formatted["seed"] = image["seed"]
+    if "cached" in image:
+        formatted["cached"] = image["cached"]
+    return formatted
+
+def format_task_output(output):
+    logger.debug("Task output", extra={"output": output})
+
+    if is_json(output):
+        image = json.loads(output)
+        if (
+            isinstance(image, dict)
+            and image.get("type") == "image"
+            and "image_id" in image
+        ):
+            return {"type": "image", **format_image(image)}
+        if isinstance(image, dict) and image.get("type") == "images":
+            return {
+                "type": "images",
+                "images": [format_image(item) for item in image["images"]],
+                "errors": image.get("errors", [])
+            }
+    return {
+        "type": "text",
+        "data": output
+    }
+
+def record_image_cache(stats, formatted_output):
+    # Per-run image cache hits and misses, counted from the images each task produced
+    images = formatted_output.get(
+        "images", [formatted_output] if formatted_output["type"] == "image" else []
+    )
+    for image in images:
+        if "cached" in image:
+            stats["hits" if image["cached"] else "misses"] += 1
+
+def kickoff_crew(crew, formatted_tasks, start_time, run_id, trace):
+    # Blocking: always called on the run store's executor, never on the event loop
+    from llm_cache import attach_run_stats
+    cache_stats = attach_run_stats(crew)
+    attach_run_trace(crew, trace)
+    metrics = TaskMetrics(formatted_tasks, trace)
+    for index, task in enumerate(formatted_tasks):
+        task.callback = partial(metrics.on_task_complete, index)
+    with span("crew.kickoff", trace=trace):
+        response = crew.kickoff()
+
+    task_outputs = []
+    image_cache_stats = {"hits": 0, "misses": 0}
+    for task in formatted_tasks:
+        formatted_output = format_task_output(task.output.raw)
+        record_image_cache(image_cache_stats, formatted_output)
+        task_outputs.append(json.dumps(formatted_output))
+            
+    end_time = time.time()
+    execution_time = end_time - start_time
+
+    return {
+        "results": response.raw,
+        "task_outputs": task_outputs,
+        "execution_time": execution_time,
+        "llm_cache": cache_stats.to_dict(),
+        "image_cache": image_cache_stats,
+        "task_metrics": metrics.to_list(),
+        "token_usage": response.token_usage.model_dump()
+        if response.token_usage
+        else None,
+        "timings": trace.summary(),
+        "run_id": run_id
+    }
+
+async def execute_mission(
+    id, api_endpoint, start_time, run=None, mode="run", log_level=None
+):
+    run_id = run["run_id"] if run is not None else str(uuid.uuid4())
+    trace = RunTrace(run_id, id)
+    token = current_trace.set(trace)
+    level_token = run_log_level.set(log_level)
+    try:
+        return await trace_mission(
+            id, api_endpoint, start_time, run_id, trace, run, mode
+        )
+    finally:
+        run_log_level.reset(level_token)
+        current_trace.reset(token)
+        trace.finish()
+
+async def trace_mission(id, api_endpoint, start_time, run_id, trace, run, mode):
+    definition = await load_mission(id, api_endpoint)
+
+    # Cached mode: an unchanged mission definition returns its last recorded result
+    # without running the crew
+    if mode == "cached":
+        try:
+            cached = await fetch_cached_run(
+                definition["inputs_hash"], definition["api_endpoint"]
+            )
+        except Exception as e:
+            # The history is an optimisation; without it the crew simply runs
+            logger.warning("Could not look up a cached run", extra={"error": str(e)})
+            cached = None
+        if cached is not None:
+            logger.info(
+                "Returning cached run", extra={"cached_run_id": cached["run_id"]}
+            )
+            return {
+                **cached["result"],
+                # The response belongs to this run; the run that produced the result is
+                # cached_run_id
+                "run_id": run_id,
+                "cached": True,
+                "cached_run_id": cached["run_id"],
+                "cached_at": cached["created_at"],
+            }
+
+    crew, formatted_tasks = await asyncio.to_thread(build_crew, definition)
+    result = await run_store.run_blocking(
+        kickoff_crew, crew, formatted_tasks, start_time, run_id, trace, run=run
+    )
+    schedule_record_run(definition, run_id, result)
+    return {**result, "cached": False}
+
+def too_many_runs(rejected):
+    return JSONResponse(
+        content={
+            "error": str(rejected),
+            "reason": rejected.reason,
+            "retry_after": rejected.retry_after,
+        },
+        status_code=429,
+        headers={"Retry-After": str(rejected.retry_after)},
+    )
+
+async def admitted(ticket, job):
+    # Holds the run's admission until it finishes, however it finishes
+    with ticket:
+        return await job
+
+def resolve_api_endpoint(request_data):
+    # Returns the catalog endpoint for this request, or the error response to send
+    # instead
+    try:
+        return config.api_endpoint(request_data.get('apiEndpoint')), None
+    except ConfigError as e:
+        logger.error("Catalog API endpoint is not configured", extra={"error": str(e)})
+        return None, JSONResponse(content={"error": str(e)}, status_code=503)
+    except ValueError as e:
+        return None, JSONResponse(content={"error": str(e)}, status_code=400)
+
 @app.post("/results")
 async def results(request: Request) -> Response:
     start_time = time.time()
     request_data = await request.json()
     id = request_data['id']
-    api_endpoint = request_data['apiEndpoint'].rstrip('/')  # Remove trailing slash if present
-    
-    print(f"Processing request for mission {id} using API endpoint: {api_endpoint}")
+    api_endpoint, error = resolve_api_endpoint(request_data)
+    if error is not None:
+        return error
+
+    # "run" (default) always executes the crew; "cached" reuses the last result of an
+    # unchanged mission
+    mode = request_data.get('mode', 'run')
+    # Optional per-request verbosity, e.g. "debug" to log payloads and CrewAI's steps
+    # for this run only
+    log_level = parse_level(request_data.get('log_level'))
+
+    logger.info(
+        "Processing request",
+        extra={"mission_id": id, "api_endpoint": api_endpoint, "mode": mode},
+    )
 
+    # Reject beyond capacity right away instead of queueing without bound
     try:
-        mission = await fetch_mission(id)
-        llm = claude_haiku
-        print("Received request data:", request_data) 
-
-
-        tasks = await fetch_mission_tasks(mission['tasks'])
-        print("Tasks fetched!")
-        print(tasks)
-        print("Processing mission ID:", id) 
-
-
-        agents = await fetch_mission_agents(mission['agents'])
-        print("Agents fetched!")
-        print(agents)
-
-        formatted_agents = format_agents(agents, llm, mission)
-        formatted_tasks = format_tasks(tasks, agents, mission['game']['S'], llm)
-        print("Tasks and agents formatted!")
-        print(formatted_tasks)
-
-        print(f"Process type: {mission['process']['S'].lower()}")
-
-        if (mission['process']['S'].lower() == 'hierarchical'):
-            manager_agent = get_manager_agent(agents)
-
-            if manager_agent is None:
-                crew = Crew(
-                    agents=formatted_agents,
-                    tasks=formatted_tasks,
-                    process=mission['process']['S'].lower(),
-                    verbose=True,
-                    manager_llm=llm,
-                )       
-            else:
-                manager_agent_formatted = get_formatted_agent(manager_agent['id']['S'], agents, llm)
-                crew = Crew(
-                    agents=formatted_agents,
-                    tasks=formatted_tasks,
-                    process=mission['process']['S'].lower(),
-                    verbose=True,
-                    manager_agent=manager_agent_formatted,
-                )
-        else:
-            crew = Crew(
-                agents=formatted_agents,
-                tasks=formatted_tasks,
-                process=mission['process']['S'].lower(),
-                verbose=True,
-            )
+        ticket = admission.admit(tenant_of(request))
+    except AdmissionRejected as rejected:
+        logger.warning(
+            "Mission run rejected", extra={"mission_id": id, "reason": rejected.reason}
+        )
+        return too_many_runs(rejected)
 
-        response = crew.kickoff()
+    # Job mode: respond with a run ID right away and let the client poll for the outcome
+    if request_data.get('async', False):
+        run = run_store.submit(
+            id,
+            lambda run: admitted(
+                ticket,
+                execute_mission(
+                    id,
+                    api_endpoint,
+                    start_time,
+                    run=run,
+                    mode=mode,
+                    log_level=log_level,
+                ),
+            ),
+        )
+        return JSONResponse(content=run_status(run), status_code=202)
 
-        task_outputs = []
-        for task in formatted_tasks:
-            output = task.output.raw
-
-            print(f"Task output: {output}")
-
-            if is_json(output):
-                with open("images/" + json.loads(output)["image_file_name"], "r") as file:
-                    image_data = file.read()  
-                task_outputs.append(json.dumps({
-                    "type": "image",
-                    "data": image_data 
-                }))
-            else:
-                task_outputs.append(json.dumps({
-                    "type": "text",
-                    "data": output
-                }))
-                
-        end_time = time.time()
-        execution_time = end_time - start_time
-
-        return JSONResponse(content={
-            "results": response.raw,
-            "task_outputs": task_outputs,
-            "execution_time": execution_time
+    try:
+        content = await admitted(
+            ticket,
+            execute_mission(
+                id, api_endpoint, start_time, mode=mode, log_level=log_level
+            ),
+        )
+        return JSONResponse(content=content)
+
+    except httpx.HTTPStatusError as exc:
+        return JSONResponse(
+            content={"error": str(exc)}, status_code=exc.response.status_code
+        )
+    except Exception as e:
+        logger.exception("Mission run failed", extra={"mission_id": id})
+        return JSONResponse(content={"error": str(e)}, status_code=500)
+
+# CloudFront and the load balancer close a response after 60 seconds without data, and a
+# task can take longer
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def stream_mission(
+    definition, crew, formatted_tasks, start_time, trace, ticket, log_level=None
+):
+    # The response body is iterated on its own task, so the run's context is set again
+    # here
+    current_trace.set(trace)
+    run_log_level.set(log_level)
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    timings = {"last": None}
+    run_id = trace.run_id
+    image_cache_stats = {"hits": 0, "misses": 0}
+    metrics = TaskMetrics(formatted_tasks, trace)
+    task_outputs = [None] * len(formatted_tasks)
+
+    # Called by CrewAI on the executor thread as soon as each task finishes
+    def on_task_complete(index, task_output):
+        now = time.time()
+        previous = timings["last"] or now
+        timings["last"] = now
+        metrics.on_task_complete(index)
+        formatted_output = format_task_output(task_output.raw)
+        task_outputs[index] = json.dumps(formatted_output)
+        record_image_cache(image_cache_stats, formatted_output)
+        event = sse_event("task", {
+            "index": index,
+            **formatted_output,
+            "duration": now - previous,
+            "elapsed": now - start_time,
         })
+        loop.call_soon_threadsafe(queue.put_nowait, event)
+
+    from llm_cache import attach_run_stats
+    cache_stats = attach_run_stats(crew)
+    attach_run_trace(crew, trace)
+
+    def on_kickoff():
+        timings["last"] = time.time()
+        with span("crew.kickoff", trace=trace):
+            return crew.kickoff()
+
+    for index, task in enumerate(formatted_tasks):
+        task.callback = partial(on_task_complete, index)
+
+    # Closing the response on disconnect raises GeneratorExit at a yield; the finally
+    # still runs
+    try:
+        yield sse_event("start", {"tasks": len(formatted_tasks)})
 
+        kickoff = asyncio.ensure_future(run_store.run_blocking(on_kickoff))
+        kickoff.add_done_callback(lambda _: queue.put_nowait(None))
+        # The crew keeps running if the client disconnects, so it keeps its slot until
+        # it finishes
+        ticket.hold_until(kickoff)
+
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), SSE_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                # An SSE comment line, ignored by EventSource, keeps the idle connection
+                # open
+                yield ": keep-alive\n\n"
+                continue
+            if event is None:
+                break
+            yield event
+
+        try:
+            response = kickoff.result()
+            result = {
+                "results": response.raw,
+                "task_outputs": task_outputs,
+                "execution_time": time.time() - start_time,
+                "llm_cache": cache_stats.to_dict(),
+                "image_cache": image_cache_stats,
+                "task_metrics": metrics.to_list(),
+                "token_usage": response.token_usage.model_dump()
+                if response.token_usage
+                else None,
+                "timings": trace.summary(),
+                "run_id": run_id,
+            }
+            schedule_record_run(definition, run_id, result)
+            yield sse_event(
+                "complete",
+                {key: value for key, value in result.items() if key != "task_outputs"},
+            )
+        except Exception as e:
+            logger.exception("Streamed mission run failed")
+            yield sse_event("error", {"error": str(e)})
+    finally:
+        trace.finish()
+
+@app.post("/results/stream")
+async def results_stream(request: Request) -> Response:
+    start_time = time.time()
+    request_data = await request.json()
+    id = request_data['id']
+    api_endpoint, error = resolve_api_endpoint(request_data)
+    if error is not None:
+        return error
+
+    log_level = parse_level(request_data.get('log_level'))
+
+    try:
+        ticket = admission.admit(tenant_of(request))
+    except AdmissionRejected as rejected:
+        logger.warning(
+            "Mission stream rejected",
+            extra={"mission_id": id, "reason": rejected.reason},
+        )
+        return too_many_runs(rejected)
+
+    trace = RunTrace(str(uuid.uuid4()), id)
+    token = current_trace.set(trace)
+    level_token = run_log_level.set(log_level)
+    logger.info("Streaming results")
+    try:
+        definition = await load_mission(id, api_endpoint)
+        crew, formatted_tasks = await asyncio.to_thread(build_crew, definition)
     except httpx.HTTPStatusError as exc:
-        return JSONResponse(content={"error": str(exc)}, status_code=exc.response.status_code)
+        trace.finish()
+        ticket.release()
+        return JSONResponse(
+            content={"error": str(exc)}, status_code=exc.response.status_code
+        )
     except Exception as e:
-        print(e)
+        logger.exception("Loading mission failed")
+        trace.finish()
+        ticket.release()
         return JSONResponse(content={"error": str(e)}, status_code=500)
+    finally:
+        run_log_level.reset(level_token)
+        current_trace.reset(token)
 
-client = TestClient(app)
+    return StreamingResponse(
+        stream_mission(
+            definition, crew, formatted_tasks, start_time, trace, ticket, log_level
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # Released here only if the body never started the crew, e.g. the client
+        # disconnected first
+        background=BackgroundTask(ticket.release_unless_held),
+    )
 
-def test_main():
-    response = client.post("/results", json={
-        "id": "1",
-        "apiEndpoint": "http://localhost:3000/api"
-    })
+@app.get("/results/{run_id}/status")
+async def result_status(run_id: str) -> Response:
+    run = run_store.get(run_id)
+    if run is None:
+        return JSONResponse(
+            content={"error": f"No run found with ID: {run_id}"}, status_code=404
+        )
+    return JSONResponse(content=run_status(run))
 
-# test_main()
+@app.get("/results/{run_id}")
+async def result(run_id: str) -> Response:
+    run = run_store.get(run_id)
+    if run is None:
+        return JSONResponse(
+            content={"error": f"No run found with ID: {run_id}"}, status_code=404
+        )
+    if run["status"] == "completed":
+        return JSONResponse(content={**run_status(run), **run["result"]})
+    if run["status"] == "failed":
+        return JSONResponse(content=run_status(run), status_code=500)
+    return JSONResponse(content=run_status(run), status_code=202)
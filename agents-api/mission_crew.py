@@ -0,0 +1,64 @@
+from crewai import Agent, Crew, Task
+from crewai.tasks.task_output import TaskOutput
+from pydantic import Field
+
+
+class MissionAgent(Agent):
+    """Agent shared by all of a mission's tasks that starts every task without earlier
+    tool results.
+
+    CrewAI keeps tool results for the agent's lifetime and answers with the last one
+    marked result_as_answer, so one generated image would otherwise become the answer of
+    every later task.
+    """
+
+    def execute_task(self, task, context=None, tools=None):
+        self.tools_results = []
+        return super().execute_task(task, context, tools)
+
+
+class JoinTask(Task):
+    """Synchronous step that waits for the async tasks before it and repeats the output
+    of the last one.
+
+    It never calls the LLM; it only exists because CrewAI joins running async tasks at
+    the next synchronous task and a crew has to finish with a single output.
+    """
+
+    description: str = Field(
+        default="Wait for the tasks running concurrently to finish"
+    )
+    expected_output: str = Field(default="The output of the last of those tasks")
+
+    def execute_sync(self, agent=None, context=None, tools=None):
+        last = self.context[-1].output if self.context else None
+        self.output = TaskOutput(
+            description=self.description,
+            expected_output=self.expected_output,
+            raw=last.raw if last is not None else "",
+            agent=(agent or self.agent).role,
+        )
+        return self.output
+
+    def copy(self, agents, task_mapping):
+        # Task.copy always builds a plain Task, which would send the join to the LLM
+        copied = super().copy(agents, task_mapping)
+        return JoinTask(
+            description=copied.description,
+            expected_output=copied.expected_output,
+            agent=copied.agent,
+            context=copied.context,
+        )
+
+
+class MissionCrew(Crew):
+    """Crew that gives tasks declared without dependencies no context.
+
+    CrewAI treats an empty context like a missing one and passes every earlier output
+    instead.
+    """
+
+    def _get_context(self, task, task_outputs):
+        if task.context is not None and not task.context:
+            return ""
+        return super()._get_context(task, task_outputs)
@@ -0,0 +1,124 @@
+import asyncio
+import contextvars
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from logs import logger
+from telemetry import Histogram, registry
+
+# Number of crews that may execute at the same time on this worker
+MAX_CONCURRENT_RUNS = int(os.getenv("MAX_CONCURRENT_RUNS", "4"))
+# How long finished runs are kept around for polling clients
+RUN_RETENTION_SECONDS = int(os.getenv("RUN_RETENTION_SECONDS", "3600"))
+
+RUN_QUEUE_WAIT = registry.register(
+    Histogram(
+        "agent_api_run_queue_wait_seconds",
+        "Time admitted crews waited for a free run slot",
+    )
+)
+
+
+class RunStore:
+    """Tracks mission runs and executes crews on a bounded thread pool."""
+
+    def __init__(
+        self, max_workers=MAX_CONCURRENT_RUNS, retention=RUN_RETENTION_SECONDS
+    ):
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="crew-run"
+        )
+        self.retention = retention
+        self.runs = {}
+        # Crews handed to the executor that have not started yet
+        self.waiting = 0
+        self.waiting_lock = threading.Lock()
+        # Strong references to background jobs so they are not garbage collected
+        self.jobs = set()
+
+    def create(self, mission_id):
+        self.prune()
+        run_id = str(uuid.uuid4())
+        run = {
+            "run_id": run_id,
+            "mission_id": mission_id,
+            "status": "queued",
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "error": None,
+        }
+        self.runs[run_id] = run
+        return run
+
+    def get(self, run_id):
+        return self.runs.get(run_id)
+
+    def submit(self, mission_id, job_factory):
+        # job_factory receives the run record and returns the coroutine to execute
+        run = self.create(mission_id)
+        job = asyncio.create_task(self._execute(run, job_factory(run)))
+        self.jobs.add(job)
+        job.add_done_callback(self.jobs.discard)
+        return run
+
+    async def run_blocking(self, fn, *args, run=None):
+        queued_at = time.monotonic()
+        state = {"waiting": True}
+        with self.waiting_lock:
+            self.waiting += 1
+
+        # Runs once, whether the crew starts or the caller is cancelled while it is
+        # still queued
+        def leave_queue():
+            with self.waiting_lock:
+                if state["waiting"]:
+                    state["waiting"] = False
+                    self.waiting -= 1
+
+        def call():
+            leave_queue()
+            RUN_QUEUE_WAIT.observe(time.monotonic() - queued_at)
+            if run is not None:
+                run["status"] = "running"
+                run["started_at"] = time.time()
+            return fn(*args)
+
+        # Carry context variables such as the run's trace onto the executor thread
+        context = contextvars.copy_context()
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self.executor, context.run, call)
+        finally:
+            leave_queue()
+
+    async def _execute(self, run, job):
+        try:
+            run["result"] = await job
+            run["status"] = "completed"
+        except Exception as e:
+            logger.exception("Run failed", extra={"run_id": run["run_id"]})
+            run["status"] = "failed"
+            run["error"] = str(e)
+        finally:
+            run["finished_at"] = time.time()
+
+    def prune(self):
+        cutoff = time.time() - self.retention
+        expired = [
+            run_id for run_id, run in self.runs.items()
+            if run["finished_at"] is not None and run["finished_at"] < cutoff
+        ]
+        for run_id in expired:
+            self.runs.pop(run_id)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def run_status(run):
+    return {key: value for key, value in run.items() if key != "result"}
@@ -0,0 +1,592 @@
+import contextlib
+import ctypes
+import importlib.metadata
+import importlib.util
+import json
+import multiprocessing
+import multiprocessing.connection
+import os
+import queue
+import re
+import resource
+import select
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import traceback
+
+from logs import logger
+
+# Warm worker processes kept ready to run generated code
+CODE_SANDBOX_WORKERS = int(os.getenv("CODE_SANDBOX_WORKERS", "2"))
+# Per-execution limits applied with setrlimit in the process that runs the code
+CODE_SANDBOX_CPU_SECONDS = int(os.getenv("CODE_SANDBOX_CPU_SECONDS", "60"))
+CODE_SANDBOX_MEMORY_MB = int(os.getenv("CODE_SANDBOX_MEMORY_MB", "1024"))
+CODE_SANDBOX_FILE_MB = int(os.getenv("CODE_SANDBOX_FILE_MB", "64"))
+CODE_SANDBOX_MAX_OUTPUT = int(os.getenv("CODE_SANDBOX_MAX_OUTPUT", "65536"))
+# Imported once per worker; every execution forks from the worker and starts with them
+# loaded
+CODE_SANDBOX_PRELOAD = [
+    m.strip()
+    for m in os.getenv("CODE_SANDBOX_PRELOAD", "numpy,pandas").split(",")
+    if m.strip()
+]
+# Executions a worker serves before it is replaced with a fresh one
+CODE_SANDBOX_MAX_EXECUTIONS = int(os.getenv("CODE_SANDBOX_MAX_EXECUTIONS", "200"))
+# Libraries requested by the code that are not in the image are pip-installed here once
+# per name and version. Off by default: the names come from the model, so only enable it
+# where installing arbitrary wheels is acceptable
+CODE_SANDBOX_LIBRARY_DIR = os.getenv(
+    "CODE_SANDBOX_LIBRARY_DIR", "./cache/sandbox-libraries"
+)
+CODE_SANDBOX_ALLOW_INSTALL = (
+    os.getenv("CODE_SANDBOX_ALLOW_INSTALL", "false").lower() == "true"
+)
+CODE_SANDBOX_INSTALL_TIMEOUT = int(os.getenv("CODE_SANDBOX_INSTALL_TIMEOUT", "180"))
+CODE_SANDBOX_INSTALL_FILE_MB = int(os.getenv("CODE_SANDBOX_INSTALL_FILE_MB", "256"))
+# When the API runs as root, generated code runs as this user (nobody) instead
+CODE_SANDBOX_UID = int(os.getenv("CODE_SANDBOX_UID", "65534"))
+
+# Extra seconds the API waits for a worker to report before treating it as hung
+WORKER_GRACE_SECONDS = 5
+# How often a worker checks whether the code has exited while its output pipe is quiet
+CHILD_POLL_SECONDS = 0.05
+
+# The only environment variables generated code sees; everything else, such as the task
+# role's AWS_CONTAINER_CREDENTIALS_RELATIVE_URI, is removed before it runs
+SANDBOX_ENVIRONMENT = (
+    "PATH", "LANG", "LC_ALL", "LC_CTYPE", "TZ",
+    "OPENBLAS_NUM_THREADS", "OMP_NUM_THREADS", "MKL_NUM_THREADS", "MPLBACKEND",
+)
+# Workers are started with only these and their own settings, so no credentials ever
+# reach their memory
+WORKER_ENVIRONMENT_PREFIXES = ("CODE_SANDBOX_", "LOG_")
+# Installs additionally need to reach the package index
+INSTALL_ENVIRONMENT = SANDBOX_ENVIRONMENT + (
+    "HTTP_PROXY",
+    "HTTPS_PROXY",
+    "NO_PROXY",
+    "PIP_INDEX_URL",
+    "PIP_EXTRA_INDEX_URL",
+    "PIP_TRUSTED_HOST",
+)
+
+# Run by the install child with -I, so it sees neither the API's modules nor PYTHON*
+# variables: it limits itself, then runs pip in the same process with wheels only, so no
+# setup.py ever runs
+INSTALL_SCRIPT = """
+import resource, runpy, sys
+target, requirement = sys.argv[1:3]
+for kind, soft, hard in ((resource.RLIMIT_CPU, int(sys.argv[3]), int(sys.argv[3]) + 1),
+                         (resource.RLIMIT_AS, int(sys.argv[4]), int(sys.argv[4])),
+                         (resource.RLIMIT_FSIZE, int(sys.argv[5]), int(sys.argv[5])),
+                         (resource.RLIMIT_CORE, 0, 0)):
+    current = resource.getrlimit(kind)[1]
+    if current != resource.RLIM_INFINITY:
+        soft, hard = min(soft, current), min(hard, current)
+    resource.setrlimit(kind, (soft, hard))
+sys.argv = ["pip", "install", "--quiet", "--no-input", "--disable-pip-version-check",
+            "--no-cache-dir", "--only-binary", ":all:", "--target", target, requirement]
+runpy.run_module("pip", run_name="__main__", alter_sys=True)
+"""
+
+# Runs a worker with the API's import path, so it finds this module and the preloaded
+# libraries
+WORKER_SCRIPT = """
+import sys
+sys.path[:] = __import__("json").loads(sys.argv[1])
+import sandbox
+preload = [module for module in sys.argv[3].split(",") if module]
+sandbox.worker_main(int(sys.argv[2]), preload)
+"""
+
+PR_SET_DUMPABLE = 4
+
+# A bare distribution name or name==version; anything else (URLs, pip options) is
+# rejected
+REQUIREMENT_PATTERN = re.compile(
+    r"([A-Za-z0-9][A-Za-z0-9._-]*)(?:==([A-Za-z0-9.*+!_-]+))?"
+)
+
+
+def is_module(name):
+    # Only the top-level package is looked up: find_spec on a dotted name imports its
+    # parents
+    try:
+        return importlib.util.find_spec(name.partition(".")[0]) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def is_available(name, version):
+    if version is None and (
+        name.partition(".")[0] in sys.stdlib_module_names or is_module(name)
+    ):
+        return True
+    try:
+        installed = importlib.metadata.version(name)
+    except importlib.metadata.PackageNotFoundError:
+        return False
+    return version is None or installed == version
+
+
+class LibraryCache:
+    """Installs libraries requested by generated code once and shares them between
+    executions."""
+
+    def __init__(
+        self, root=CODE_SANDBOX_LIBRARY_DIR, allow_install=CODE_SANDBOX_ALLOW_INSTALL
+    ):
+        self.root = os.path.abspath(root)
+        self.allow_install = allow_install
+        self.paths = {}
+        self.failures = {}
+        self.locks = {}
+        self.lock = threading.Lock()
+
+    def ensure(self, libraries):
+        """Returns (sys.path entries the code needs, errors) for the requested
+        libraries."""
+        paths = []
+        errors = []
+        for library in libraries:
+            requirement = library.replace(" ", "")
+            if not requirement:
+                continue
+            match = REQUIREMENT_PATTERN.fullmatch(requirement)
+            if match is None:
+                errors.append(f"{library}: unsupported requirement")
+                continue
+
+            name, version = match.groups()
+            if is_available(name, version):
+                continue
+            if not self.allow_install:
+                errors.append(
+                    f"{requirement}: not installed and library installs are disabled"
+                )
+                continue
+
+            try:
+                paths.append(self.install(name.lower(), version))
+            except Exception as e:
+                errors.append(f"{requirement}: {e}")
+        return paths, errors
+
+    def install(self, name, version):
+        key = f"{name}=={version}" if version else name
+        with self.lock:
+            lock = self.locks.setdefault(key, threading.Lock())
+
+        with lock:
+            if key in self.paths:
+                return self.paths[key]
+            if key in self.failures:
+                raise RuntimeError(self.failures[key])
+
+            target = os.path.join(self.root, key.replace("==", "-"))
+            if not os.path.isdir(target):
+                # Install next to the target and rename, so a half-finished install is
+                # never used
+                staging = f"{target}.tmp"
+                shutil.rmtree(staging, ignore_errors=True)
+                completed = self.run_install(staging, key)
+                if completed.returncode != 0:
+                    shutil.rmtree(staging, ignore_errors=True)
+                    self.failures[key] = (
+                        f"pip install failed: {completed.stderr.strip()[-500:]}"
+                    )
+                    raise RuntimeError(self.failures[key])
+                os.makedirs(self.root, exist_ok=True)
+                os.replace(staging, target)
+
+            self.paths[key] = target
+            return target
+
+    def run_install(self, staging, requirement):
+        """Runs pip in a limited child with a scrubbed environment, so it never sees the
+        task role's credentials."""
+        home = tempfile.mkdtemp(prefix="sandbox-install-")
+        try:
+            return subprocess.run(
+                [
+                    sys.executable,
+                    "-I",
+                    "-c",
+                    INSTALL_SCRIPT,
+                    staging,
+                    requirement,
+                    str(CODE_SANDBOX_INSTALL_TIMEOUT),
+                    str(CODE_SANDBOX_MEMORY_MB * 1024 * 1024),
+                    str(CODE_SANDBOX_INSTALL_FILE_MB * 1024 * 1024),
+                ],
+                cwd=home,
+                env=sandbox_environment(home, INSTALL_ENVIRONMENT),
+                stdin=subprocess.DEVNULL,
+                capture_output=True,
+                text=True,
+                timeout=CODE_SANDBOX_INSTALL_TIMEOUT,
+                start_new_session=True,
+            )
+        except subprocess.TimeoutExpired:
+            return subprocess.CompletedProcess([], 1, "", "timed out")
+        finally:
+            shutil.rmtree(home, ignore_errors=True)
+
+
+def sandbox_environment(home, allowed=SANDBOX_ENVIRONMENT):
+    environment = {name: os.environ[name] for name in allowed if name in os.environ}
+    environment.setdefault("PATH", os.defpath)
+    environment.update(HOME=home, TMPDIR=home)
+    return environment
+
+
+def worker_environment():
+    environment = sandbox_environment(tempfile.gettempdir())
+    environment.update(
+        (name, value)
+        for name, value in os.environ.items()
+        if name.startswith(WORKER_ENVIRONMENT_PREFIXES)
+    )
+    return environment
+
+
+def make_undumpable():
+    """Stops processes of the same user from reading this process's /proc entries, such
+    as its environ.
+
+    Generated code runs as the API's user, so without this it could read the credentials
+    of the API and of its worker from /proc/<pid>/environ. Returns False where prctl is
+    unavailable.
+    """
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        return libc.prctl(PR_SET_DUMPABLE, 0, 0, 0, 0) == 0
+    except (OSError, AttributeError):
+        return False
+
+
+def drop_privileges(uid):
+    # Root may read every process's /proc entries, undumpable or not
+    if os.geteuid() != 0:
+        return
+    os.setgroups([])
+    os.setgid(uid)
+    os.setuid(uid)
+
+
+def set_limit(kind, soft, hard=None):
+    hard = soft if hard is None else hard
+    _, current_hard = resource.getrlimit(kind)
+    if current_hard != resource.RLIM_INFINITY:
+        soft, hard = min(soft, current_hard), min(hard, current_hard)
+    resource.setrlimit(kind, (soft, hard))
+
+
+def run_child(job, write_fd, workdir):
+    # Own process group, so a timeout also kills anything the code started
+    os.setpgid(0, 0)
+    os.chdir(workdir)
+
+    stdin = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(stdin, 0)
+    os.dup2(write_fd, 1)
+    os.dup2(write_fd, 2)
+
+    environment = sandbox_environment(workdir)
+    os.environ.clear()
+    os.environ.update(environment)
+
+    # CPU overrun sends SIGXCPU at the soft limit and SIGKILL one second later
+    set_limit(resource.RLIMIT_CPU, job["cpu_seconds"], job["cpu_seconds"] + 1)
+    set_limit(resource.RLIMIT_AS, job["memory_mb"] * 1024 * 1024)
+    set_limit(resource.RLIMIT_FSIZE, CODE_SANDBOX_FILE_MB * 1024 * 1024)
+    set_limit(resource.RLIMIT_CORE, 0)
+    drop_privileges(CODE_SANDBOX_UID)
+
+    sys.path[:0] = job.get("paths", [])
+
+    exit_code = 0
+    try:
+        exec(compile(job["code"], "<code>", "exec"), {"__name__": "__main__"})
+    except SystemExit as e:
+        exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    except BaseException as e:
+        # Skip this frame so the traceback only shows the generated code
+        traceback.print_exception(type(e), e, e.__traceback__.tb_next)
+        exit_code = 1
+
+    try:
+        sys.stdout.flush()
+        sys.stderr.flush()
+    finally:
+        os._exit(exit_code)
+
+
+def execute(job, connection):
+    """Runs one job in a forked child of this worker and returns its output and resource
+    usage."""
+    read_fd, write_fd = os.pipe()
+    workdir = tempfile.mkdtemp(prefix="sandbox-")
+    if os.geteuid() == 0:
+        os.chown(workdir, CODE_SANDBOX_UID, CODE_SANDBOX_UID)
+    sys.stdout.flush()
+    sys.stderr.flush()
+
+    started = time.monotonic()
+    pid = os.fork()
+    if pid == 0:
+        connection.close()
+        os.close(read_fd)
+        run_child(job, write_fd, workdir)
+    os.close(write_fd)
+
+    output = bytearray()
+    truncated = False
+    timed_out = False
+    deadline = started + job["timeout"]
+    reaped = 0
+    try:
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                timed_out = True
+                break
+            ready, _, _ = select.select(
+                [read_fd], [], [], min(remaining, CHILD_POLL_SECONDS)
+            )
+            if not ready:
+                # A background process started by the code keeps the pipe open after the
+                # code has exited, so stop once the child is gone and its output has
+                # been drained
+                reaped, status, usage = os.wait4(pid, os.WNOHANG)
+                if reaped:
+                    break
+                continue
+            chunk = os.read(read_fd, 65536)
+            if not chunk:
+                break
+            # Keep draining past the limit so the child never blocks on a full pipe
+            room = CODE_SANDBOX_MAX_OUTPUT - len(output)
+            output.extend(chunk[:max(room, 0)])
+            truncated = truncated or len(chunk) > room
+    finally:
+        os.close(read_fd)
+        # The group outlives its leader while background processes remain, so this also
+        # kills them
+        with contextlib.suppress(ProcessLookupError, PermissionError):
+            os.killpg(pid, signal.SIGKILL)
+        if not reaped:
+            _, status, usage = os.wait4(pid, 0)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    exit_code = os.waitstatus_to_exitcode(status)
+    return {
+        "output": output.decode("utf-8", errors="replace"),
+        "exit_code": exit_code,
+        "timed_out": timed_out,
+        "cpu_limited": exit_code in (-signal.SIGXCPU, -signal.SIGKILL)
+        and not timed_out,
+        "truncated": truncated,
+        "duration": time.monotonic() - started,
+        "cpu_time": usage.ru_utime + usage.ru_stime,
+    }
+
+
+def worker_main(fd, preload=()):
+    # Interrupts are handled by the API process, which shuts the pool down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    make_undumpable()
+    connection = multiprocessing.connection.Connection(fd)
+
+    # Keep numeric libraries single-threaded so preloading does not reserve memory per
+    # core
+    for variable in ("OPENBLAS_NUM_THREADS", "OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ.setdefault(variable, "1")
+    os.environ.setdefault("MPLBACKEND", "Agg")
+
+    for module in preload:
+        try:
+            __import__(module)
+        except Exception as e:
+            logger.warning(
+                "Sandbox worker could not preload a module",
+                extra={"preload": module, "error": str(e)},
+            )
+
+    while True:
+        try:
+            job = connection.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+        connection.send(execute(job, connection))
+
+
+class SandboxWorker:
+    def __init__(self, preload):
+        self.connection, child_connection = multiprocessing.Pipe()
+        # A fresh interpreter keeps workers free of the API's threads and open
+        # connections, and an explicit environment keeps the API's credentials out of
+        # the worker's /proc/<pid>/environ
+        fd = child_connection.fileno()
+        self.process = subprocess.Popen(
+            [
+                sys.executable,
+                "-c",
+                WORKER_SCRIPT,
+                json.dumps(sys.path),
+                str(fd),
+                ",".join(preload),
+            ],
+            env=worker_environment(),
+            stdin=subprocess.DEVNULL,
+            pass_fds=(fd,),
+        )
+        child_connection.close()
+        self.executions = 0
+
+    def run(self, job, wait):
+        """Sends a job and waits for the result; returns None if the worker died or
+        hung."""
+        try:
+            self.connection.send(job)
+            if self.connection.poll(wait):
+                return self.connection.recv()
+        except (EOFError, OSError):
+            pass
+        return None
+
+    def stop(self):
+        with contextlib.suppress(OSError):
+            self.connection.send(None)
+        self.connection.close()
+        try:
+            self.process.wait(1)
+        except subprocess.TimeoutExpired:
+            self.kill()
+
+    def kill(self):
+        self.process.kill()
+        with contextlib.suppress(subprocess.TimeoutExpired):
+            self.process.wait(1)
+
+
+class SandboxPool:
+    """Pool of pre-started worker processes that execute untrusted code with hard
+    limits.
+
+    Each execution runs in a fresh child forked from a warm worker, so rlimits apply per
+    execution and a timeout kills the child's whole process group instead of abandoning
+    a thread.
+    """
+
+    def __init__(self, size=CODE_SANDBOX_WORKERS, preload=CODE_SANDBOX_PRELOAD,
+                 max_executions=CODE_SANDBOX_MAX_EXECUTIONS, libraries=None):
+        # Generated code runs as the API's user, so keep it from reading the API's
+        # environment
+        make_undumpable()
+        self.preload = tuple(preload)
+        self.max_executions = max_executions
+        self.libraries = libraries if libraries is not None else LibraryCache()
+        self.idle = queue.Queue()
+        self.workers = set()
+        self.lock = threading.Lock()
+        self.closed = False
+        for _ in range(size):
+            self.idle.put(self._start_worker())
+
+    def _start_worker(self):
+        worker = SandboxWorker(self.preload)
+        with self.lock:
+            self.workers.add(worker)
+        return worker
+
+    def _replace(self, worker, kill=True):
+        with self.lock:
+            self.workers.discard(worker)
+        if kill:
+            worker.kill()
+        else:
+            worker.stop()
+        if not self.closed:
+            # Start the replacement off the caller's thread; spawning takes a moment
+            threading.Thread(
+                target=lambda: self.idle.put(self._start_worker()), daemon=True
+            ).start()
+
+    def execute(self, code, timeout, libraries=(), cpu_seconds=CODE_SANDBOX_CPU_SECONDS,
+                memory_mb=CODE_SANDBOX_MEMORY_MB):
+        # Installs happen before a worker is taken, so a slow first install does not
+        # block other code
+        paths, library_errors = self.libraries.ensure(libraries)
+
+        try:
+            worker = self.idle.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError("No code sandbox became available") from None
+
+        job = {
+            "code": code,
+            "timeout": timeout,
+            "cpu_seconds": cpu_seconds,
+            "memory_mb": memory_mb,
+            "paths": paths,
+        }
+        result = worker.run(job, timeout + WORKER_GRACE_SECONDS)
+
+        if result is None:
+            self._replace(worker)
+            return {
+                "output": "The code sandbox stopped responding.",
+                "exit_code": -1,
+                "timed_out": True,
+                "cpu_limited": False,
+                "truncated": False,
+                "duration": timeout,
+                "cpu_time": 0.0,
+                "library_errors": library_errors,
+            }
+
+        worker.executions += 1
+        if worker.executions >= self.max_executions:
+            threading.Thread(
+                target=self._replace, args=(worker, False), daemon=True
+            ).start()
+        else:
+            self.idle.put(worker)
+        return {**result, "library_errors": library_errors}
+
+    def shutdown(self):
+        self.closed = True
+        with self.lock:
+            workers = list(self.workers)
+            self.workers.clear()
+        for worker in workers:
+            worker.stop()
+
+
+sandbox_pool = None
+sandbox_pool_lock = threading.Lock()
+
+
+def get_sandbox_pool():
+    """Returns the process-wide sandbox pool, starting its workers on first use."""
+    global sandbox_pool
+    with sandbox_pool_lock:
+        if sandbox_pool is None:
+            sandbox_pool = SandboxPool()
+        return sandbox_pool
+
+
+def shutdown_sandbox_pool():
+    global sandbox_pool
+    with sandbox_pool_lock:
+        if sandbox_pool is not None:
+            sandbox_pool.shutdown()
+            sandbox_pool = None
@@ -0,0 +1,85 @@
+def get_task_dependencies(mission, tasks):
+    """Returns {task_id: [dependency ids]} for tasks that declare dependencies.
+
+    A mission-level "depends_on" map overrides the list stored on the task itself.
+    An empty result means the mission uses the legacy strictly-serial chaining.
+    """
+    overrides = mission.get('depends_on', {}).get('M', {})
+    dependencies = {}
+
+    for task in tasks:
+        task_id = task['id']['S']
+        declared = overrides.get(task_id) or task.get('depends_on')
+        if declared is not None:
+            dependencies[task_id] = [dependency['S'] for dependency in declared['L']]
+
+    return dependencies
+
+
+def dependency_levels(task_ids, dependencies):
+    """Groups task IDs so every task only depends on tasks in earlier levels, keeping
+    mission order inside a level."""
+    known = set(task_ids)
+    levels = {}
+    visiting = set()
+
+    def level_of(task_id):
+        if task_id in levels:
+            return levels[task_id]
+        if task_id in visiting:
+            raise ValueError(
+                f"Task dependencies contain a cycle through task {task_id}"
+            )
+
+        visiting.add(task_id)
+        upstream = [d for d in dependencies.get(task_id, []) if d in known]
+        levels[task_id] = 1 + max((level_of(d) for d in upstream), default=-1)
+        visiting.discard(task_id)
+        return levels[task_id]
+
+    for task_id in task_ids:
+        level_of(task_id)
+
+    grouped = [[] for _ in range(max(levels.values(), default=-1) + 1)]
+    for task_id in task_ids:
+        grouped[levels[task_id]].append(task_id)
+    return grouped
+
+
+def execution_plan(levels, agents=None):
+    """Turns dependency levels into [(task_id, async_execution)] in CrewAI execution
+    order.
+
+    CrewAI starts consecutive async tasks together and makes the next synchronous task
+    wait for all of them. An agent can only work on one task at a time, so a level is
+    split into batches whose tasks use different agents ({task_id: agent}); a batch of
+    several tasks runs asynchronously and is followed by a join, given as (None, False),
+    that waits for all of them before the next batch starts and keeps a single final
+    output for the crew.
+    """
+    plan = []
+    for level in levels:
+        for batch in agent_batches(level, agents or {}):
+            if len(batch) == 1:
+                plan.append((batch[0], False))
+            else:
+                plan.extend((task_id, True) for task_id in batch)
+                plan.append((None, False))
+    return plan
+
+
+def agent_batches(task_ids, agents):
+    """Splits task IDs into batches in which no agent has more than one task, keeping
+    their order."""
+    batches = []
+    for task_id in task_ids:
+        agent = agents.get(task_id, task_id)
+        batch_agents, batch = next(
+            (entry for entry in batches if agent not in entry[0]), (None, None)
+        )
+        if batch is None:
+            batch_agents, batch = set(), []
+            batches.append((batch_agents, batch))
+        batch_agents.add(agent)
+        batch.append(task_id)
+    return [batch for _, batch in batches]
@@ -0,0 +1,325 @@
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Set to an OTLP/HTTP collector (e.g. http://localhost:4318) to also export spans with
+# OpenTelemetry
+OTEL_EXPORTER_OTLP_ENDPOINT = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "")
+OTEL_SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "agents-api")
+
+DURATION_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+    30,
+    60,
+    120,
+    300,
+)
+
+
+def format_labels(names, values):
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values, strict=True):
+        escaped = (
+            str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        )
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class Counter:
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(label, "") for label in self.labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} counter",
+        ]
+        with self.lock:
+            for key, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{format_labels(self.labels, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, labels=(), buckets=DURATION_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # {label values: [bucket counts..., sum, count]}
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(label, "") for label in self.labels)
+        with self.lock:
+            series = self.values.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self.lock:
+            for key, series in sorted(self.values.items()):
+                for bound, count in zip(self.buckets, series, strict=False):
+                    labels = format_labels(self.labels + ("le",), key + (bound,))
+                    lines.append(f"{self.name}_bucket{labels} {count}")
+                labels = format_labels(self.labels + ("le",), key + ("+Inf",))
+                lines.append(f"{self.name}_bucket{labels} {series[-1]}")
+                lines.append(
+                    f"{self.name}_sum{format_labels(self.labels, key)} {series[-2]}"
+                )
+                lines.append(
+                    f"{self.name}_count{format_labels(self.labels, key)} {series[-1]}"
+                )
+        return lines
+
+
+class Gauge:
+    """Gauge whose value is read from a callback when /metrics is scraped."""
+
+    def __init__(self, name, documentation, read):
+        self.name = name
+        self.documentation = documentation
+        self.read = read
+
+    def render(self):
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} gauge",
+            f"{self.name} {self.read()}",
+        ]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+SPAN_DURATION = registry.register(
+    Histogram(
+        "agent_api_span_duration_seconds",
+        "Duration of traced operations by kind "
+        "(catalog.fetch, crew.build, task, llm.call, tool.call, ...)",
+        ["span", "name"],
+    )
+)
+SPAN_ERRORS = registry.register(
+    Counter(
+        "agent_api_span_errors_total", "Traced operations that raised", ["span", "name"]
+    )
+)
+LLM_TOKENS = registry.register(
+    Counter(
+        "agent_api_llm_tokens_total",
+        "LLM tokens by model and direction",
+        ["model", "type"],
+    )
+)
+
+tracer = None
+tracer_lock = threading.Lock()
+
+
+def get_tracer():
+    """Returns the OpenTelemetry tracer, or None when no collector is configured."""
+    global tracer
+    if not OTEL_EXPORTER_OTLP_ENDPOINT:
+        return None
+    with tracer_lock:
+        if tracer is None:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+                OTLPSpanExporter,
+            )
+            from opentelemetry.sdk.resources import Resource
+            from opentelemetry.sdk.trace import TracerProvider
+            from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+            # A private provider, so CrewAI's own telemetry provider is left alone
+            provider = TracerProvider(
+                resource=Resource.create({"service.name": OTEL_SERVICE_NAME})
+            )
+            endpoint = OTEL_EXPORTER_OTLP_ENDPOINT.rstrip("/") + "/v1/traces"
+            provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=endpoint)))
+            tracer = provider.get_tracer("agents-api")
+        return tracer
+
+
+class RunTrace:
+    """Spans recorded during one mission run; summarized per span kind in the run's
+    result."""
+
+    def __init__(self, run_id, mission_id):
+        self.run_id = run_id
+        self.mission_id = mission_id
+        self.spans = []
+        self.lock = threading.Lock()
+        self.root = None
+        self.otel_context = None
+
+        otel_tracer = get_tracer()
+        if otel_tracer is not None:
+            from opentelemetry import trace
+            self.root = otel_tracer.start_span(
+                "mission.run", attributes={"run.id": run_id, "mission.id": mission_id}
+            )
+            self.otel_context = trace.set_span_in_context(self.root)
+
+    def record(self, kind, name, duration):
+        with self.lock:
+            self.spans.append((kind, name, duration))
+
+    def summary(self):
+        summary = {}
+        with self.lock:
+            for kind, _, duration in self.spans:
+                entry = summary.setdefault(kind, {"count": 0, "total": 0.0, "max": 0.0})
+                entry["count"] += 1
+                entry["total"] += duration
+                entry["max"] = max(entry["max"], duration)
+        return summary
+
+    def finish(self):
+        if self.root is not None:
+            self.root.end()
+
+
+# The run being traced on this task or thread; threads CrewAI starts itself use explicit
+# run_trace attributes
+current_trace = contextvars.ContextVar("current_trace", default=None)
+
+
+def resolve_trace(trace):
+    return trace if trace is not None else current_trace.get()
+
+
+@contextmanager
+def span(kind, name="", trace=None, **attributes):
+    """Times a block into the span histogram and the run's trace; yields a dict for
+    extra attributes."""
+    trace = resolve_trace(trace)
+    otel_span = None
+    otel_tracer = get_tracer()
+    if otel_tracer is not None:
+        otel_span = otel_tracer.start_span(
+            kind,
+            context=trace.otel_context if trace is not None else None,
+            attributes={"name": name, **attributes},
+        )
+
+    started = time.perf_counter()
+    try:
+        yield attributes
+    except Exception as e:
+        SPAN_ERRORS.inc(span=kind, name=name)
+        if otel_span is not None:
+            otel_span.record_exception(e)
+        raise
+    finally:
+        duration = time.perf_counter() - started
+        SPAN_DURATION.observe(duration, span=kind, name=name)
+        if trace is not None:
+            trace.record(kind, name, duration)
+        if otel_span is not None:
+            otel_span.set_attributes(
+                {key: value for key, value in attributes.items() if value is not None}
+            )
+            otel_span.end()
+
+
+def record_span(kind, name, duration, trace=None, **attributes):
+    """Records an operation that was timed elsewhere, e.g. a CrewAI task's execution
+    time."""
+    trace = resolve_trace(trace)
+    SPAN_DURATION.observe(duration, span=kind, name=name)
+    if trace is not None:
+        trace.record(kind, name, duration)
+
+    otel_tracer = get_tracer()
+    if otel_tracer is not None:
+        end = time.time_ns()
+        otel_span = otel_tracer.start_span(
+            kind,
+            context=trace.otel_context if trace is not None else None,
+            start_time=end - int(duration * 1e9),
+            attributes={
+                "name": name,
+                **{
+                    key: value for key, value in attributes.items() if value is not None
+                },
+            },
+        )
+        otel_span.end(end_time=end)
+
+
+def attach_run_trace(crew, trace):
+    """Points every LLM and tool of the crew at this run's trace.
+
+    CrewAI runs async tasks on threads it starts itself, which do not inherit
+    current_trace, so per-run LLM copies and tool clones carry the trace instead.
+    """
+    for agent in [*crew.agents, crew.manager_agent]:
+        if agent is not None and hasattr(agent.llm, "run_trace"):
+            agent.llm.run_trace = trace
+    if hasattr(crew.manager_llm, "run_trace"):
+        crew.manager_llm.run_trace = trace
+
+    clones = {}
+
+    def clone_tools(tools):
+        if not tools:
+            return tools
+        cloned = []
+        for tool in tools:
+            if "run_trace" in getattr(type(tool), "model_fields", {}):
+                if id(tool) not in clones:
+                    clones[id(tool)] = tool.model_copy(update={"run_trace": trace})
+                tool = clones[id(tool)]
+            cloned.append(tool)
+        return cloned
+
+    for agent in crew.agents:
+        agent.tools = clone_tools(agent.tools)
+    for task in crew.tasks:
+        task.tools = clone_tools(task.tools)
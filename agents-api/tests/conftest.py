@@ -0,0 +1,30 @@
+import os
+import tempfile
+
+# CrewAI and LiteLLM would otherwise reach out to the network when a crew is built
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+# Importing main creates the local artifact store
+os.environ.setdefault("ARTIFACT_DIR", tempfile.mkdtemp(prefix="artifacts-"))
+
+import pytest
+
+
+@pytest.fixture
+def scripted_llm():
+    """Builds an LLM that answers each prompt with respond(messages) instead of calling
+    a model."""
+    from crewai import LLM
+
+    class ScriptedLLM(LLM):
+        def __init__(self, respond):
+            super().__init__(model="scripted")
+            self.respond = respond
+
+        def call(self, messages, callbacks=None):
+            return self.respond(messages)
+
+        def supports_stop_words(self):
+            return False
+
+    return ScriptedLLM
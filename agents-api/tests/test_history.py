@@ -0,0 +1,104 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+import main
+from history import history_record, parse_history_item
+
+
+def stored_item(record):
+    # What add-run writes and get-runs returns for a history record
+    return {
+        "mission_id": {"S": record["mission_id"]},
+        "run_id": {"S": record["run_id"]},
+        "inputs_hash": {"S": record["inputs_hash"]},
+        "created_at": {"N": str(record["created_at"])},
+        "status": {"S": record["status"]},
+        "execution_time": {"N": str(record["execution_time"])},
+        "result": {"S": json.dumps(record["result"])},
+    }
+
+
+def run_result(task_outputs):
+    return {
+        "results": task_outputs[-1],
+        "task_outputs": [
+            json.dumps({"type": "text", "data": output}) for output in task_outputs
+        ],
+        "execution_time": 1.5,
+        "run_id": "run-1",
+    }
+
+
+def test_large_result_is_compressed_to_fit_one_item():
+    result = run_result(["lorem ipsum " * 40000, "dolor sit amet " * 40000])
+
+    item = stored_item(history_record("m", "run-1", "hash", result))
+
+    assert len(item["result"]["S"]) < 400 * 1024
+    assert parse_history_item(item)["result"] == result
+
+
+def test_result_too_large_to_compress_is_stored_without_outputs():
+    result = run_result([os.urandom(300 * 1024).hex()])
+
+    item = stored_item(history_record("m", "run-1", "hash", result))
+    stored = parse_history_item(item)["result"]
+
+    assert len(item["result"]["S"]) < 400 * 1024
+    assert stored["truncated"] is True
+    assert "task_outputs" not in stored
+    assert stored["execution_time"] == 1.5
+
+
+@pytest.fixture
+def mission(monkeypatch):
+    async def load_mission(id, api_endpoint):
+        return {"id": id, "inputs_hash": "hash", "api_endpoint": api_endpoint}
+
+    async def run_blocking(*args, **kwargs):
+        return {
+            "results": "fresh",
+            "task_outputs": [],
+            "execution_time": 2.0,
+            "run_id": "new-run",
+        }
+
+    monkeypatch.setattr(main, "load_mission", load_mission)
+    monkeypatch.setattr(main, "build_crew", lambda definition: (None, []))
+    monkeypatch.setattr(main.run_store, "run_blocking", run_blocking)
+    monkeypatch.setattr(main, "schedule_record_run", lambda *args: None)
+
+
+def trace_cached(fetch_cached_run, monkeypatch):
+    monkeypatch.setattr(main, "fetch_cached_run", fetch_cached_run)
+    return asyncio.run(
+        main.trace_mission("m", "http://catalog", 0, "new-run", None, None, "cached")
+    )
+
+
+def test_cached_result_is_reported_under_the_new_run(mission, monkeypatch):
+    async def fetch_cached_run(inputs_hash, api_endpoint):
+        return {
+            "run_id": "old-run",
+            "created_at": 1,
+            "result": {"results": "cached", "run_id": "old-run"},
+        }
+
+    result = trace_cached(fetch_cached_run, monkeypatch)
+
+    assert result["results"] == "cached"
+    assert result["run_id"] == "new-run"
+    assert result["cached_run_id"] == "old-run"
+
+
+def test_failed_history_lookup_runs_the_crew(mission, monkeypatch):
+    async def fetch_cached_run(inputs_hash, api_endpoint):
+        raise ConnectionError("catalog unavailable")
+
+    result = trace_cached(fetch_cached_run, monkeypatch)
+
+    assert result["results"] == "fresh"
+    assert result["cached"] is False
@@ -0,0 +1,53 @@
+"""Guards the API's startup path: importing main stays fast and leaves the heavy
+libraries to load lazily."""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+AGENTS_API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_TIME_BUDGET = float(os.getenv("IMPORT_TIME_BUDGET", "2.0"))
+IMPORT_TIME_RUNS = 3
+
+# Modules that must stay off the import path of main
+LAZY_MODULES = [
+    "crewai",
+    "crewai_tools",
+    "langchain",
+    "langchain_core",
+    "litellm",
+    "PIL",
+    "fastapi.testclient",
+]
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import main
+elapsed = time.perf_counter() - started
+imported = [name for name in %r if name in sys.modules]
+print(json.dumps({"seconds": elapsed, "imported": imported}))
+""" % (LAZY_MODULES,)
+
+
+def measure():
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=AGENTS_API_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_importing_main_is_fast_and_lazy():
+    samples = [measure() for _ in range(IMPORT_TIME_RUNS)]
+    imported = sorted({name for sample in samples for name in sample["imported"]})
+    median = statistics.median(sample["seconds"] for sample in samples)
+
+    assert imported == []
+    assert median <= IMPORT_TIME_BUDGET, (
+        f"median import time {median:.3f}s exceeds {IMPORT_TIME_BUDGET:.1f}s"
+    )
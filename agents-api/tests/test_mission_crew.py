@@ -0,0 +1,165 @@
+import json
+import re
+import threading
+import time
+
+from crewai import Crew, Task
+from crewai_tools.tools.base_tool import BaseTool
+
+from crew_cache import CrewTemplate
+from main import format_tasks
+from mission_crew import MissionAgent
+
+
+class FakeImageTool(BaseTool):
+    name: str = "Image Generator"
+    description: str = "Generates an image from a prompt."
+    result_as_answer: bool = True
+
+    def _run(self, prompt: str) -> str:
+        return json.dumps({"type": "image", "image_id": "0" * 32 + ".png"})
+
+
+def test_tool_answer_does_not_leak_into_the_agents_next_task(scripted_llm):
+    def respond(messages):
+        prompt = messages[-1]["content"]
+        if "Draw" in prompt and "Observation" not in prompt:
+            return (
+                "Thought: I will draw it\nAction: Image Generator\n"
+                'Action Input: {"prompt": "a barn"}'
+            )
+        return "Thought: I know the answer\nFinal Answer: A short caption"
+
+    agent = MissionAgent(
+        role="Artist",
+        goal="Make art",
+        backstory="Paints",
+        llm=scripted_llm(respond),
+        tools=[FakeImageTool()],
+        allow_delegation=False,
+    )
+    draw = Task(description="Draw a barn", expected_output="An image", agent=agent)
+    caption = Task(
+        description="Caption the barn",
+        expected_output="A caption",
+        agent=agent,
+        context=[],
+    )
+
+    Crew(agents=[agent], tasks=[draw, caption]).kickoff()
+
+    assert json.loads(draw.output.raw)["type"] == "image"
+    assert caption.output.raw == "A short caption"
+
+
+def mission_task(task_id, agent_id):
+    return {
+        "id": {"S": task_id},
+        "description": {"S": f"Write part {task_id}"},
+        "expected_output": {"S": "A paragraph"},
+        "agent": {"S": agent_id},
+    }
+
+
+class TimedResponder:
+    """Answers every task after a short delay and records when each task was being
+    worked on."""
+
+    def __init__(self, delay=0.4):
+        self.delay = delay
+        self.spans = {}
+        self.prompts = {}
+        self.lock = threading.Lock()
+
+    def __call__(self, messages):
+        prompt = messages[-1]["content"]
+        part = re.search(r"Write part (\w+)", prompt).group(1)
+        started = time.monotonic()
+        time.sleep(self.delay)
+        with self.lock:
+            self.spans[part] = (started, time.monotonic())
+            self.prompts[part] = prompt
+        return f"Thought: done\nFinal Answer: text of part {part}"
+
+    def overlap(self, first, second):
+        (start_a, end_a), (start_b, end_b) = self.spans[first], self.spans[second]
+        return start_a < end_b and start_b < end_a
+
+
+def run_mission(tasks, agent_ids, dependencies, responder, llm_class):
+    agents = {
+        agent_id: MissionAgent(
+            role=agent_id,
+            goal="Write",
+            backstory="Writes",
+            llm=llm_class(responder),
+            allow_delegation=False,
+        )
+        for agent_id in agent_ids
+    }
+    formatted_tasks, output_tasks = format_tasks(
+        tasks, agents, "a test", dependencies=dependencies
+    )
+    crew, outputs = CrewTemplate(
+        list(agents.values()),
+        formatted_tasks,
+        {"process": "sequential"},
+        None,
+        output_tasks,
+    ).instantiate()
+    result = crew.kickoff()
+    return result, [task.output.raw for task in outputs]
+
+
+def test_independent_tasks_of_different_agents_overlap(scripted_llm):
+    responder = TimedResponder()
+
+    result, outputs = run_mission(
+        [mission_task("a", "writer"), mission_task("b", "editor")],
+        ["writer", "editor"],
+        {"a": [], "b": []},
+        responder,
+        scripted_llm,
+    )
+
+    assert responder.overlap("a", "b")
+    assert outputs == ["text of part a", "text of part b"]
+    assert result.raw == "text of part b"
+
+
+def test_tasks_of_one_agent_do_not_overlap(scripted_llm):
+    responder = TimedResponder(delay=0.2)
+
+    run_mission(
+        [
+            mission_task("a", "writer"),
+            mission_task("b", "writer"),
+            mission_task("c", "editor"),
+        ],
+        ["writer", "editor"],
+        {"a": [], "b": [], "c": []},
+        responder,
+        scripted_llm,
+    )
+
+    assert responder.overlap("a", "c")
+    assert not responder.overlap("a", "b")
+
+
+def test_task_without_dependencies_gets_no_context(scripted_llm):
+    responder = TimedResponder(delay=0)
+
+    run_mission(
+        [
+            mission_task("a", "writer"),
+            mission_task("b", "writer"),
+            mission_task("c", "writer"),
+        ],
+        ["writer"],
+        {"b": [], "c": ["a"]},
+        responder,
+        scripted_llm,
+    )
+
+    assert "text of part a" not in responder.prompts["b"]
+    assert "text of part a" in responder.prompts["c"]
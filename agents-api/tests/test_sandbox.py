@@ -0,0 +1,29 @@
+import os
+
+from sandbox import LibraryCache, SandboxPool
+
+READ_PARENT_ENVIRONMENTS = """
+import os
+for pid in (os.getppid(), {api_pid}):
+    try:
+        with open(f"/proc/{{pid}}/environ", "rb") as environ:
+            print(environ.read().decode(errors="replace"))
+    except OSError as e:
+        print(type(e).__name__)
+print(sorted(os.environ))
+"""
+
+
+def test_code_cannot_read_credentials_from_its_parents(monkeypatch):
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "sandbox-test-secret")
+    pool = SandboxPool(size=1, preload=(), libraries=LibraryCache(allow_install=False))
+    try:
+        result = pool.execute(
+            READ_PARENT_ENVIRONMENTS.format(api_pid=os.getpid()), timeout=30
+        )
+    finally:
+        pool.shutdown()
+
+    assert result["exit_code"] == 0, result["output"]
+    assert "sandbox-test-secret" not in result["output"]
+    assert "AWS_SECRET_ACCESS_KEY" not in result["output"]
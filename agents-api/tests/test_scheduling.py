@@ -0,0 +1,51 @@
+from scheduling import dependency_levels, execution_plan
+
+JOIN = (None, False)
+
+
+def plan_for(task_ids, dependencies, agents=None):
+    return execution_plan(dependency_levels(task_ids, dependencies), agents)
+
+
+def test_diamond_runs_middle_tasks_concurrently():
+    # a -> {b, c} -> d: b and c start together once a is done, the join makes d wait for
+    # both
+    plan = plan_for(["a", "b", "c", "d"], {"b": ["a"], "c": ["a"], "d": ["b", "c"]})
+
+    assert plan == [("a", False), ("b", True), ("c", True), JOIN, ("d", False)]
+
+
+def test_independent_final_tasks_run_concurrently_and_join():
+    plan = plan_for(["a", "b"], {"a": [], "b": []})
+
+    assert plan == [("a", True), ("b", True), JOIN]
+
+
+def test_every_level_joins_before_the_next_starts():
+    plan = plan_for(
+        ["a", "b", "c", "d", "e"], {"c": ["a", "b"], "d": ["a", "b"], "e": ["a", "b"]}
+    )
+
+    assert plan == [
+        ("a", True),
+        ("b", True),
+        JOIN,
+        ("c", True),
+        ("d", True),
+        ("e", True),
+        JOIN,
+    ]
+
+
+def test_tasks_of_one_agent_never_run_together():
+    plan = plan_for(
+        ["a", "b", "c"], {}, agents={"a": "writer", "b": "writer", "c": "artist"}
+    )
+
+    assert plan == [("a", True), ("c", True), JOIN, ("b", False)]
+
+
+def test_chain_stays_serial():
+    plan = plan_for(["a", "b", "c"], {"b": ["a"], "c": ["b"]})
+
+    assert plan == [("a", False), ("b", False), ("c", False)]
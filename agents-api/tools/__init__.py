@@ -1,2 +1,3 @@
 from .image_generator.image_generator import ImageGeneratorTool
+from .image_generator.image_cache import ImageCache
 from .code_interpreter.code_interpreter import TimeoutCodeInterpreterTool
\ No newline at end of file
@@ -1,23 +1,57 @@
+from typing import Any
+
 from crewai_tools import CodeInterpreterTool as BaseCodeInterpreterTool
-import asyncio
-import signal
+
+from sandbox import get_sandbox_pool
+from telemetry import span
+
 
 class TimeoutCodeInterpreterTool(BaseCodeInterpreterTool):
-    def __init__(self, timeout=120, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.timeout = timeout
-    
+    # Wall-clock seconds before the code's process group is killed
+    timeout: int = 120
+    # RunTrace of the run this clone belongs to; set by telemetry.attach_run_trace
+    run_trace: Any = None
+
     def _run(self, **kwargs):
+        with span("tool.call", self.name, trace=self.run_trace):
+            return self._execute(**kwargs)
+
+    def _execute(self, **kwargs):
+        code = kwargs.get("code", self.code)
+        libraries_used = kwargs.get("libraries_used", [])
+        if isinstance(libraries_used, str):
+            libraries_used = libraries_used.split(",")
+
         try:
-            # Set a timeout for the code execution
-            result = asyncio.run(self._run_with_timeout(**kwargs))
-            return result
-        except asyncio.TimeoutError:
-            return "Code execution timed out. Please simplify your code or break it into smaller parts."
-    
-    async def _run_with_timeout(self, **kwargs):
-        # Run the original _run method with a timeout
-        return await asyncio.wait_for(
-            asyncio.to_thread(super()._run, **kwargs),
-            timeout=self.timeout
-        )
\ No newline at end of file
+            # Runs in a forked sandbox process with CPU and memory rlimits instead of
+            # Docker or this process
+            result = get_sandbox_pool().execute(code, self.timeout, libraries_used)
+        except TimeoutError:
+            return "All code sandboxes are busy. Please try again later."
+
+        if result["timed_out"]:
+            return (
+                "Code execution timed out. "
+                "Please simplify your code or break it into smaller parts."
+            )
+
+        if result["cpu_limited"]:
+            return (
+                "Code execution exceeded its CPU limit. "
+                "Please simplify your code or break it into smaller parts."
+            )
+
+        output = result["output"]
+        if result["library_errors"]:
+            unavailable = "; ".join(result["library_errors"])
+            output = f"[Libraries unavailable: {unavailable}]\n{output}"
+        if result["truncated"]:
+            output += "\n[Output truncated]"
+        output += (
+            f"\n[Execution time: {result['duration']:.2f}s, "
+            f"CPU time: {result['cpu_time']:.2f}s]"
+        )
+
+        if result["exit_code"] != 0:
+            return f"Something went wrong while running the code: \n{output}"
+        return output
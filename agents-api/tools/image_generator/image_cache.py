@@ -0,0 +1,67 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+# Maximum number of prompt -> image entries remembered; 0 disables the cache
+IMAGE_CACHE_SIZE = int(os.getenv("IMAGE_CACHE_SIZE", "512"))
+
+
+def normalize_prompt(prompt):
+    # Case and whitespace differences do not change what the agent asked for
+    return " ".join(prompt.lower().split())
+
+
+class ImageCache:
+    """LRU map from (normalized prompt, seed, model ID) to previously generated
+    artifacts.
+
+    Entries only reference artifacts, so a hit is returned only while the artifact store
+    still holds the image; otherwise the entry is dropped and the image is generated
+    again.
+    """
+
+    def __init__(self, artifact_store, max_size=IMAGE_CACHE_SIZE):
+        self.artifact_store = artifact_store
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, prompt, seed, model_id):
+        payload = {"prompt": normalize_prompt(prompt), "seed": seed, "model": model_id}
+        return hashlib.sha256(
+            json.dumps(payload, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and not self.artifact_store.exists(entry["image_id"]):
+                del self.entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, entry):
+        if self.max_size <= 0:
+            return
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def stats(self):
+        return {
+            "size": len(self.entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
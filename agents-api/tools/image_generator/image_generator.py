@@ -1,60 +1,167 @@
-import json
-from typing import Type, Optional
-from pydantic import BaseModel, Field
-from crewai_tools.tools.base_tool import BaseTool
-import boto3
 import base64
-import io
-from PIL import Image
-import time
-import random
+import json
 import os
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Optional, Type
+
+import boto3
+from botocore.config import Config
+from crewai_tools.tools.base_tool import BaseTool
+from pydantic import BaseModel, Field
+
+from telemetry import span
+
+from .image_store import save_image
+
+IMAGE_MODEL_ID = os.getenv("IMAGE_MODEL_ID", "stability.stable-image-ultra-v1:0")
+# Image requests in flight at once across every crew in this process
+IMAGE_MAX_CONCURRENCY = int(os.getenv("IMAGE_MAX_CONCURRENCY", "4"))
+IMAGE_MAX_PROMPTS = int(os.getenv("IMAGE_MAX_PROMPTS", "8"))
+IMAGE_MAX_ATTEMPTS = int(os.getenv("IMAGE_MAX_ATTEMPTS", "8"))
+MAX_PROMPT_LENGTH = 500
+MAX_SEED = 4294967294
+
+bedrock_client = None
+bedrock_client_lock = threading.Lock()
+image_executor = ThreadPoolExecutor(
+    max_workers=IMAGE_MAX_CONCURRENCY, thread_name_prefix="image-gen"
+)
+
+
+def get_bedrock_client():
+    """Returns the process-wide bedrock-runtime client, creating it on first use."""
+    global bedrock_client
+    with bedrock_client_lock:
+        if bedrock_client is None:
+            bedrock_client = boto3.client('bedrock-runtime', config=Config(
+                max_pool_connections=IMAGE_MAX_CONCURRENCY * 2,
+                read_timeout=120,
+                # Adaptive mode backs off and rate-limits the client when Bedrock
+                # throttles
+                retries={"mode": "adaptive", "max_attempts": IMAGE_MAX_ATTEMPTS},
+            ))
+        return bedrock_client
+
 
 class ImagePromptSchema(BaseModel):
     """Input prompt for Generic Image Generator Tool."""
-    prompt: str = Field(description="The text prompt describing the image to generate")
+    prompt: Optional[str] = Field(
+        default=None, description="The text prompt describing the image to generate"
+    )
+    prompts: Optional[List[str]] = Field(
+        default=None,
+        description=(
+            "Several prompts to generate in one call, e.g. the panels of a storyboard"
+        ),
+    )
+    seed: Optional[int] = Field(
+        default=None,
+        description=(
+            "Seed for reproducible images; with several prompts, image N uses seed + N"
+        ),
+    )
 
 class ImageGeneratorTool(BaseTool):
     name: str = "ImageGenerator"
-    description: str = "Generates images from text prompts using Amazon Bedrock."
+    description: str = (
+        "Generates images from one or more text prompts using Amazon Bedrock."
+    )
     args_schema: Type[BaseModel] = ImagePromptSchema
+    # ArtifactStore the generated images are written to
+    artifact_store: Any = None
+    # Optional ImageCache that answers repeated prompts with an existing artifact
+    image_cache: Any = None
+    # RunTrace of the run this clone belongs to; set by telemetry.attach_run_trace
+    run_trace: Any = None
+
+    def _generate(self, prompt, seed):
+        # Unseeded requests are cached under seed None, so a repeated prompt reuses its
+        # earlier image
+        key = None
+        if self.image_cache is not None:
+            key = self.image_cache.key(prompt, seed, IMAGE_MODEL_ID)
+            cached = self.image_cache.get(key)
+            if cached is not None:
+                return {**cached, "cached": True}
+
+        if seed is None:
+            seed = random.randint(0, MAX_SEED)
+
+        with span("bedrock.invoke_model", IMAGE_MODEL_ID, trace=self.run_trace):
+            response = get_bedrock_client().invoke_model(
+                modelId=IMAGE_MODEL_ID,
+                body=json.dumps({"prompt": prompt, "seed": seed})
+            )
+            output_body = json.loads(response["body"].read())
+
+        # Decode once and keep real image bytes; the API serves them from GET
+        # /images/{id}
+        image_id, thumbnail_id = save_image(
+            self.artifact_store, base64.b64decode(output_body["images"][0])
+        )
+
+        image = {
+            "image_id": image_id,
+            "thumbnail_id": thumbnail_id,
+            "seed": seed
+        }
+        if key is not None:
+            self.image_cache.put(key, image)
+        return {**image, "cached": False}
 
     def _run(self, **kwargs) -> str:
-        prompt = kwargs.get("prompt")
+        with span("tool.call", self.name, trace=self.run_trace):
+            return self._generate_all(**kwargs)
 
-        if not prompt:
-            return "Prompt is required."
-        
-        if len(prompt) > 500:
-            return f"Error: Prompt exceeds 500 characters. Please provide a shorter description."
+    def _generate_all(self, **kwargs) -> str:
+        prompts = kwargs.get("prompts") or []
+        if kwargs.get("prompt"):
+            prompts = [kwargs["prompt"], *prompts]
 
-        bedrock = boto3.client('bedrock-runtime')
+        if not prompts:
+            return "Prompt is required."
 
-        body = json.dumps({
-            "prompt": prompt,
-            "seed": int(time.time()) % 4294967295,  # Use time-based seed
-        })
+        if len(prompts) > IMAGE_MAX_PROMPTS:
+            return (
+                f"Error: At most {IMAGE_MAX_PROMPTS} prompts "
+                "can be generated in one call."
+            )
 
-        try:
-            response = bedrock.invoke_model(
-                modelId='stability.stable-image-ultra-v1:0',
-                body=body
+        if any(len(prompt) > MAX_PROMPT_LENGTH for prompt in prompts):
+            return (
+                f"Error: Prompt exceeds {MAX_PROMPT_LENGTH} characters. "
+                "Please provide a shorter description."
             )
-            
-            output_body = json.loads(response["body"].read())
-            base64_image = output_body["images"][0]
-
-            # Ensure images directory exists
-            os.makedirs("images", exist_ok=True)
-            
-            new_file_name = f"image_{time.time()}.txt"
-            with open("images/" + new_file_name, "w", encoding="utf-8") as file:
-                file.write(base64_image)
-
-            return json.dumps({
-                "type": "image",
-                "image_file_name": new_file_name
-            })
-
-        except Exception as e:
-            return f"Error generating image: {str(e)}"
\ No newline at end of file
+
+        seed = kwargs.get("seed")
+        if seed is None:
+            seeds = [None] * len(prompts)
+        else:
+            seeds = [(seed + index) % (MAX_SEED + 1) for index in range(len(prompts))]
+
+        futures = [
+            image_executor.submit(self._generate, prompt, seed)
+            for prompt, seed in zip(prompts, seeds, strict=True)
+        ]
+
+        images = []
+        errors = []
+        for prompt, future in zip(prompts, futures, strict=True):
+            try:
+                images.append({"prompt": prompt, **future.result()})
+            except Exception as e:
+                errors.append(f"{prompt[:50]}: {e}")
+
+        if not images:
+            return f"Error generating image: {'; '.join(errors)}"
+
+        if len(prompts) == 1:
+            return json.dumps({"type": "image", **images[0]})
+
+        return json.dumps({
+            "type": "images",
+            "images": images,
+            "errors": errors
+        })
@@ -0,0 +1,48 @@
+import io
+import os
+
+from PIL import Image
+
+# "png" keeps Bedrock's bytes as-is; "webp" or "jpeg" re-encode them with Pillow
+IMAGE_FORMAT = os.getenv("IMAGE_FORMAT", "png").lower()
+IMAGE_QUALITY = int(os.getenv("IMAGE_QUALITY", "85"))
+# Longest edge of an additional WebP thumbnail; 0 disables thumbnails
+IMAGE_THUMBNAIL_SIZE = int(os.getenv("IMAGE_THUMBNAIL_SIZE", "0"))
+
+PIL_FORMATS = {"png": "PNG", "webp": "WEBP", "jpeg": "JPEG"}
+
+
+def encode(image, image_format):
+    buffer = io.BytesIO()
+    if image_format == "jpeg" and image.mode != "RGB":
+        image = image.convert("RGB")
+    image.save(buffer, PIL_FORMATS[image_format], quality=IMAGE_QUALITY)
+    return buffer.getvalue()
+
+
+def save_image(
+    artifact_store,
+    image_bytes,
+    image_format=IMAGE_FORMAT,
+    thumbnail_size=IMAGE_THUMBNAIL_SIZE,
+):
+    """Stores decoded image bytes as artifacts and returns (image_id, thumbnail_id or
+    None)."""
+    image_format = image_format if image_format in PIL_FORMATS else "png"
+
+    image = None
+    if image_format != "png" or thumbnail_size:
+        image = Image.open(io.BytesIO(image_bytes))
+
+    image_id = artifact_store.put(
+        image_bytes if image_format == "png" else encode(image, image_format),
+        image_format,
+    )
+
+    thumbnail_id = None
+    if thumbnail_size:
+        thumbnail = image.copy()
+        thumbnail.thumbnail((thumbnail_size, thumbnail_size))
+        thumbnail_id = artifact_store.put(encode(thumbnail, "webp"), "webp")
+
+    return image_id, thumbnail_id
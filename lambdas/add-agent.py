@@ -1,52 +1,31 @@
-import boto3
 import json
 import os
+from lambda_common import dynamodb_client, response, version_stamp, ValidationError
+from item_fields import item_attributes
 
-def main(event, context):
+def main(event, context, table_name=None):
     statusCode = 200
     isBase64Encoded = False  # Typically, this should be False for JSON responses
-    headers = {
-        "Content-Type": "application/json",
-        "Access-Control-Allow-Headers": "Content-Type",
-        "Access-Control-Allow-Origin": "*",
-        "Access-Control-Allow-Methods": "POST"
-    }
 
     try:
-        dynamodb_client = boto3.client('dynamodb')
-
         # Parse the event body to get the agent details
-        agent_id = event['id']
-        role = event['role']
-        goal = event['goal']
-        backstory = event['backstory']
-        allow_delegation = event['allow_delegation']
-        tools = event.get('tools', [])  
+        item = item_attributes('agents', event)
 
         # Put item into DynamoDB
         put_response = dynamodb_client.put_item(
-            TableName=os.environ['tableName'],
-            Item={
-                'id': {'S': agent_id},
-                'role': {'S': role},
-                'goal': {'S': goal},
-                'backstory': {'S': backstory},
-                'allow_delegation': {'BOOL': allow_delegation},
-                'tools': {'L': [{'S': element} for element in tools]}
-            }
+            TableName=table_name or os.environ['tableName'],
+            Item={**item, **version_stamp()}
         )
 
         body = json.dumps({"message": "Agent added successfully."})
 
+    except ValidationError as e:
+        statusCode = 400
+        body = json.dumps({"error": str(e)})
+
     except Exception as e:
         statusCode = 500
         body = json.dumps({"error": str(e)})
 
     finally:
-        response = {
-            "isBase64Encoded": isBase64Encoded,
-            "statusCode": statusCode,
-            "body": body,
-            "headers": headers
-        }
-        return response
\ No newline at end of file
+        return response(statusCode, body, "POST", isBase64Encoded)
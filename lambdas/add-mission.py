@@ -1,52 +1,30 @@
-import boto3
-import json
 import os
+from lambda_common import dynamodb_client, response, version_stamp, ValidationError
+from item_fields import item_attributes
 
-def main(event, context):
+def main(event, context, table_name=None):
     statusCode = 200
     isBase64Encoded = True
-    headers = {
-        "Content-Type": "application/json",
-        "Access-Control-Allow-Headers": "Content-Type",
-        "Access-Control-Allow-Origin": "*",
-        "Access-Control-Allow-Methods": "POST"
-    }
 
     try:
-        dynamodb_client = boto3.client('dynamodb')
-
         print(event)
 
-        mission_id = event['id']
-        name = event['name']
-        agents = event['agents']
-        game = event['game']
-        tasks = event['tasks'] or []
+        item = item_attributes('missions', event)
 
         put_response = dynamodb_client.put_item(
-            TableName=os.environ['tableName'],
-            Item={
-                'id': {'S': mission_id},
-                'name': {'S': name},
-                'agents': {'L': [{'S': agent} for agent in agents]},
-                'game': {'S': game},
-                'process': {'S': "Sequential"},
-                'tasks': {'L': [{'S': task} for task in tasks]},
-                'results': {'S': ""}
-            }
+            TableName=table_name or os.environ['tableName'],
+            Item={**item, **version_stamp()}
         )
 
         body = "Mission added successfully."
 
+    except ValidationError as e:
+        statusCode = 400
+        body = f"Error: {str(e)}"
+
     except Exception as e:
         statusCode = 500
         body = f"Error: {str(e)}"
 
     finally:
-        response = {
-            "isBase64Encoded": isBase64Encoded,
-            "statusCode": statusCode,
-            "body": body,
-            "headers": headers
-        }
-        return response
\ No newline at end of file
+        return response(statusCode, body, "POST", isBase64Encoded)
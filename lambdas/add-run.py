@@ -0,0 +1,38 @@
+import json
+import os
+import time
+from lambda_common import dynamodb_client, response, require_key, field, ValidationError
+
+def main(event, context, table_name=None):
+    statusCode = 200
+    isBase64Encoded = False
+
+    try:
+        item = {
+            'mission_id': {'S': require_key(event, 'mission_id')},
+            'created_at': {'N': str(int(event.get('created_at') or time.time() * 1000))},
+            'run_id': {'S': require_key(event, 'run_id')},
+            'inputs_hash': {'S': require_key(event, 'inputs_hash')},
+            'status': {'S': field(event, 'status', default='completed')},
+            'execution_time': {'N': str(event.get('execution_time', 0))},
+            # Outputs, per-task durations and token usage are stored as one JSON document
+            'result': {'S': json.dumps(field(event, 'result', dict, default={}))},
+        }
+
+        dynamodb_client.put_item(
+            TableName=table_name or os.environ['tableName'],
+            Item=item
+        )
+
+        body = json.dumps({"run_id": event['run_id']})
+
+    except ValidationError as e:
+        statusCode = 400
+        body = json.dumps({"error": str(e)})
+
+    except Exception as e:
+        statusCode = 500
+        body = json.dumps({"error": str(e)})
+
+    finally:
+        return response(statusCode, body, "POST", isBase64Encoded)
@@ -1,50 +1,30 @@
-import boto3
-import json
 import os
+from lambda_common import dynamodb_client, response, version_stamp, ValidationError
+from item_fields import item_attributes
 
-def main(event, context):
+def main(event, context, table_name=None):
     statusCode = 200 
     isBase64Encoded = False
-    headers = {
-        "Content-Type": "application/json",
-        "Access-Control-Allow-Headers": "Content-Type",
-        "Access-Control-Allow-Origin": "*",
-        "Access-Control-Allow-Methods": "POST"
-    }
 
     try:
-        dynamodb_client = boto3.client('dynamodb')
-
         # Parse the incoming event body
-        id = event['id']
-        task_name = event['task']
-        agent_id = event['agent']
-        description = event['description']
-        expected_output = event['expected_output']
-        
+        item = {**item_attributes('tasks', event), **version_stamp()}
+
         # Put the new task into the DynamoDB table
         put_response = dynamodb_client.put_item(
-            TableName=os.environ['tableName'],
-            Item={
-                'id': {'S': id},
-                'task': {'S': task_name},
-                'agent': {'S': agent_id},
-                'description': {'S': description},
-                'expected_output': {'S': expected_output},
-            }
+            TableName=table_name or os.environ['tableName'],
+            Item=item
         )
         
         body = "New task added successfully."
 
+    except ValidationError as e:
+        statusCode = 400
+        body = str(e)
+
     except Exception as e:
         statusCode = 500
         body = str(e)
 
     finally:
-        response = {
-            "isBase64Encoded": isBase64Encoded,
-            "statusCode": statusCode,
-            "body": body,
-            "headers": headers
-        }
-        return response
\ No newline at end of file
+        return response(statusCode, body, "POST", isBase64Encoded)
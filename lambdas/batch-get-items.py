@@ -0,0 +1,68 @@
+import json
+import os
+import time
+from lambda_common import dynamodb_client, response, require, field, item_version, ValidationError
+
+# BatchGetItem accepts at most 100 keys per request
+BATCH_SIZE = 100
+MAX_RETRIES = 5
+
+def main(event, context, table_name=None):
+    statusCode = 200 
+    isBase64Encoded = False
+
+    try:
+        table_name = table_name or os.environ['tableName']
+
+        # Drop duplicate IDs while keeping the order they were requested in
+        ids = list(dict.fromkeys(require(event, 'ids', list, items=str)))
+        # {id: version} the caller already holds; items still at that version are listed as unchanged
+        versions = field(event, 'versions', dict)
+        items = []
+
+        for start in range(0, len(ids), BATCH_SIZE):
+            request_items = {
+                table_name: {
+                    'Keys': [{'id': {'S': id}} for id in ids[start:start + BATCH_SIZE]]
+                }
+            }
+
+            attempt = 0
+            while request_items:
+                batch_response = dynamodb_client.batch_get_item(RequestItems=request_items)
+                items.extend(batch_response['Responses'].get(table_name, []))
+
+                # Throttled keys come back unprocessed and must be retried with backoff
+                request_items = batch_response.get('UnprocessedKeys') or {}
+                if request_items:
+                    attempt += 1
+                    if attempt > MAX_RETRIES:
+                        raise Exception(f"Unable to fetch all items after {MAX_RETRIES} retries")
+                    time.sleep(min(0.05 * 2 ** attempt, 1))
+
+        items_by_id = {item['id']['S']: item for item in items}
+        found = [items_by_id[id] for id in ids if id in items_by_id]
+
+        if versions is None:
+            body = json.dumps(found)
+        else:
+            changed = []
+            unchanged = []
+            for item in found:
+                version = item_version(item)
+                if version is not None and versions.get(item['id']['S']) == version:
+                    unchanged.append(item['id']['S'])
+                else:
+                    changed.append(item)
+            body = json.dumps({"items": changed, "unchanged": unchanged})
+
+    except ValidationError as e:
+        statusCode = 400
+        body = json.dumps({"error": str(e)})
+
+    except Exception as e:
+        statusCode = 500
+        body = json.dumps({"error": str(e)})
+
+    finally:
+        return response(statusCode, body, "POST", isBase64Encoded)
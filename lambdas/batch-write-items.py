@@ -0,0 +1,39 @@
+import json
+import os
+from functools import partial
+from lambda_common import dynamodb_client, response, require, field, table_kind, ValidationError
+from batch_write import write_items, to_put_request, to_delete_request
+from item_fields import ITEM_FIELDS
+
+def main(event, context, table_name=None):
+    statusCode = 200
+    isBase64Encoded = False
+
+    try:
+        table_name = table_name or os.environ['tableName']
+
+        # {"ids": [...]} deletes, {"items": [...]} imports or replaces whole items
+        ids = field(event, 'ids', list)
+        if ids is not None:
+            results = write_items(dynamodb_client, table_name, ids, to_delete_request)
+        else:
+            kind = table_kind(table_name)
+            if kind not in ITEM_FIELDS:
+                raise Exception(f"No item fields are known for table {table_name}")
+            results = write_items(dynamodb_client, table_name, require(event, 'items', list), partial(to_put_request, kind))
+
+        if any(result['status'] != 'ok' for result in results):
+            statusCode = 207
+
+        body = json.dumps({"results": results})
+
+    except ValidationError as e:
+        statusCode = 400
+        body = json.dumps({"error": str(e)})
+
+    except Exception as e:
+        statusCode = 500
+        body = json.dumps({"error": str(e)})
+
+    finally:
+        return response(statusCode, body, "POST,PUT,DELETE", isBase64Encoded)
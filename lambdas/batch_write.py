@@ -0,0 +1,85 @@
+import time
+from boto3.dynamodb.types import TypeSerializer
+from lambda_common import version_stamp
+from item_fields import ITEM_FIELDS, item_attributes
+
+# BatchWriteItem accepts at most 25 put or delete requests per call
+BATCH_SIZE = 25
+MAX_RETRIES = 5
+
+serializer = TypeSerializer()
+
+def to_put_request(kind, item):
+    # The table's fields are checked and defaulted like the add-* Lambdas do; other attributes are kept as they are
+    attributes = item_attributes(kind, item)
+    extra = {key: serializer.serialize(value) for key, value in item.items()
+             if key not in attributes and key not in ITEM_FIELDS[kind]}
+    # Imported items get a fresh stamp; any version carried over from an export is stale
+    return {'PutRequest': {'Item': {**extra, **attributes, **version_stamp()}}}
+
+def to_delete_request(id):
+    if not isinstance(id, str) or not id:
+        raise ValueError("Each ID must be a non-empty string")
+
+    return {'DeleteRequest': {'Key': {'id': {'S': id}}}}
+
+def request_id(write_request):
+    if 'PutRequest' in write_request:
+        return write_request['PutRequest']['Item']['id']['S']
+    return write_request['DeleteRequest']['Key']['id']['S']
+
+def batch_write(dynamodb_client, table_name, write_requests):
+    """Sends write requests in chunks of 25, retrying UnprocessedItems with backoff. Returns {id: error} for failures."""
+    failures = {}
+
+    for start in range(0, len(write_requests), BATCH_SIZE):
+        pending = write_requests[start:start + BATCH_SIZE]
+        attempt = 0
+
+        while pending:
+            try:
+                batch_response = dynamodb_client.batch_write_item(RequestItems={table_name: pending})
+            except Exception as e:
+                failures.update({request_id(w): str(e) for w in pending})
+                break
+
+            pending = batch_response.get('UnprocessedItems', {}).get(table_name, [])
+            if pending:
+                attempt += 1
+                if attempt > MAX_RETRIES:
+                    failures.update({request_id(w): "Unprocessed after retries" for w in pending})
+                    break
+                time.sleep(min(0.05 * 2 ** attempt, 2))
+
+    return failures
+
+def write_items(dynamodb_client, table_name, values, to_request):
+    """Writes every value with BatchWriteItem and returns one result per value, in the same order."""
+    results = [None] * len(values)
+    write_requests = {}
+    positions = {}
+
+    for position, value in enumerate(values):
+        try:
+            write_request = to_request(value)
+        except (ValueError, TypeError) as e:
+            id = value.get('id') if isinstance(value, dict) else value
+            results[position] = {'id': id, 'status': 'error', 'error': str(e)}
+            continue
+
+        # A batch may not touch the same key twice, so the last write for an ID wins
+        id = request_id(write_request)
+        write_requests[id] = write_request
+        positions.setdefault(id, []).append(position)
+
+    failures = batch_write(dynamodb_client, table_name, list(write_requests.values()))
+
+    for id, id_positions in positions.items():
+        if id in failures:
+            result = {'id': id, 'status': 'error', 'error': failures[id]}
+        else:
+            result = {'id': id, 'status': 'ok'}
+        for position in id_positions:
+            results[position] = result
+
+    return results
@@ -0,0 +1,177 @@
+"""Cold versus warm latency of the routed catalog function against one function per route.
+
+Builds a synthetic API Gateway event for every route in catalog.ROUTES, the way the routing
+request template delivers it, and the event each separate handler receives today. Every cold
+start runs in a fresh interpreter: the separate layout pays one per function (handler and
+table), the routed function one in total. DynamoDB is stubbed with botocore's Stubber, and the
+Lambda runtime's own boot time, paid by every cold start in both layouts, is not included.
+
+    cd lambdas && python benchmarks/catalog_latency.py [--invocations 100]
+"""
+import argparse
+import importlib
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+LAMBDAS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, LAMBDAS_DIR)
+
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'benchmark')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'benchmark')
+for variable in ('tableName', 'agentsTable', 'missionsTable', 'tasksTable', 'runsTable', 'inputsHashIndex'):
+    os.environ.setdefault(variable, variable)
+
+# The DynamoDB call each handler makes, with a minimal valid response
+OPERATIONS = {
+    'get-agents': ('scan', {'Items': []}),
+    'get-missions': ('scan', {'Items': []}),
+    'get-tasks': ('scan', {'Items': []}),
+    'get-item': ('get_item', {'Item': {'id': {'S': 'id-1'}}}),
+    'get-runs': ('query', {'Items': []}),
+    'batch-get-items': ('batch_get_item', {'Responses': {}}),
+    'batch-write-items': ('batch_write_item', {'UnprocessedItems': {}}),
+    'delete-agents': ('batch_write_item', {'UnprocessedItems': {}}),
+    'delete-missions': ('batch_write_item', {'UnprocessedItems': {}}),
+    'delete-task': ('delete_item', {}),
+    'add-agent': ('put_item', {}),
+    'add-mission': ('put_item', {}),
+    'add-task': ('put_item', {}),
+    'add-run': ('put_item', {}),
+    'put-agent': ('put_item', {}),
+    'put-mission': ('put_item', {}),
+}
+
+# Valid request bodies per handler
+BODIES = {
+    'add-agent': {'id': 'id-1', 'role': 'Researcher', 'goal': 'Research', 'backstory': 'Curious', 'allow_delegation': False},
+    'add-mission': {'id': 'id-1', 'name': 'Mission', 'agents': ['id-1'], 'game': 'Game', 'tasks': ['id-1']},
+    'add-task': {'id': 'id-1', 'task': 'Task', 'agent': 'id-1', 'description': 'Describe', 'expected_output': 'Output'},
+    'add-run': {'mission_id': 'id-1', 'run_id': 'run-1', 'inputs_hash': 'hash'},
+    'put-agent': {'id': 'id-1', 'role': 'Writer'},
+    'put-mission': {'id': 'id-1', 'name': 'Renamed'},
+    'delete-agents': {'ids': ['id-1']},
+    'delete-missions': {'ids': ['id-1']},
+    'delete-task': {'id': 'id-1'},
+    'batch-get-items': {'ids': ['id-1']},
+    'batch-write-items': {'items': [{'id': 'id-1'}]},
+}
+
+QUERIES = {'get-runs': {'mission_id': 'id-1'}}
+
+
+def synthetic_routes():
+    """[(route label, handler module, table variable, API Gateway event, separate handler event)]"""
+    from catalog import ROUTES, TABLES
+
+    routes = []
+    for (method, resource), (name, table, source) in ROUTES.items():
+        query = QUERIES.get(name, {})
+        path = {'id': 'id-1'} if source == 'path' else {}
+        body = BODIES.get(name, {}) if source == 'body' else {}
+        event = {
+            'resource': resource,
+            'httpMethod': method,
+            'pathParameters': path,
+            'queryStringParameters': query,
+            'body': json.dumps(body),
+        }
+        handler_event = {'query': query, 'path': path, 'body': body}[source]
+        routes.append((f"{method} {resource}", name, TABLES[table], event, handler_event))
+    return routes
+
+
+def invoke_stubbed(stubber, name, call):
+    operation, stub_response = OPERATIONS[name]
+    stubber.add_response(operation, stub_response)
+    started = time.perf_counter()
+    result = call()
+    elapsed = (time.perf_counter() - started) * 1000
+    assert result['statusCode'] == 200, result
+    return elapsed
+
+
+def child(spec):
+    """Runs in a fresh interpreter: imports the function's code (init) and invokes its routes."""
+    from botocore.stub import Stubber
+
+    started = time.perf_counter()
+    if spec['layout'] == 'routed':
+        handler = importlib.import_module('catalog')
+    else:
+        handler = importlib.import_module(spec['routes'][0][1])
+    import lambda_common
+    init = (time.perf_counter() - started) * 1000
+
+    timings = {}
+    with Stubber(lambda_common.dynamodb_client) as stubber:
+        for label, name, table, event, handler_event in spec['routes']:
+            if spec['layout'] == 'routed':
+                call = lambda: handler.main(event, None)
+            else:
+                os.environ['tableName'] = os.environ[table]
+                call = lambda: handler.main(handler_event, None)
+
+            first = invoke_stubbed(stubber, name, call)
+            warm = [invoke_stubbed(stubber, name, call) for _ in range(spec['invocations'])]
+            timings[label] = {'first': first, 'warm': statistics.median(warm)}
+
+    print(json.dumps({'init': init, 'routes': timings}))
+
+
+def run_child(layout, routes, invocations):
+    spec = json.dumps({'layout': layout, 'routes': routes, 'invocations': invocations})
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child'],
+        input=spec, capture_output=True, text=True, check=True, cwd=LAMBDAS_DIR,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--invocations', type=int, default=100)
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(json.loads(sys.stdin.read()))
+        return
+
+    routes = synthetic_routes()
+
+    # One function, and so one cold start, per handler and table, as the stack deploys them
+    functions = {}
+    for route in routes:
+        functions.setdefault((route[1], route[2]), []).append(route)
+
+    separate = {}
+    for function_routes in functions.values():
+        result = run_child('separate', function_routes, args.invocations)
+        for index, (label, _, _, _, _) in enumerate(function_routes):
+            timing = result['routes'][label]
+            separate[label] = {'cold': timing['first'] + (result['init'] if index == 0 else 0), 'warm': timing['warm']}
+
+    # One cold start; every later route lands on the already initialized environment
+    routed = run_child('routed', routes, args.invocations)
+
+    print(f"{'route':<28}{'separate cold':>15}{'separate warm':>15}{'routed first':>15}{'routed warm':>13}")
+    for label, _, _, _, _ in routes:
+        print(f"{label:<28}{separate[label]['cold']:>15.2f}{separate[label]['warm']:>15.3f}"
+              f"{routed['routes'][label]['first']:>15.2f}{routed['routes'][label]['warm']:>13.3f}")
+
+    separate_total = sum(timing['cold'] for timing in separate.values())
+    routed_total = routed['init'] + sum(timing['first'] for timing in routed['routes'].values())
+    print(f"\nFirst request to every route, in ms: {separate_total:.1f} across {len(functions)} cold starts, "
+          f"{routed_total:.1f} with the routed function (one {routed['init']:.1f} ms init)")
+    separate_warm = statistics.median(timing['warm'] for timing in separate.values())
+    routed_warm = statistics.median(timing['warm'] for timing in routed['routes'].values())
+    print(f"Warm p50 across routes: {separate_warm:.3f} ms separate, {routed_warm:.3f} ms routed")
+
+
+if __name__ == '__main__':
+    main()
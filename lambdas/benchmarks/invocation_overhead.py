@@ -0,0 +1,80 @@
+"""Per-invocation overhead of the catalog Lambdas before and after the module-scope client.
+
+Invokes get-item the old way, building boto3.client('dynamodb') inside the handler, and through
+the current handler, which reuses lambda_common.dynamodb_client. DynamoDB is stubbed with
+botocore's Stubber, so the difference is client construction, endpoint resolution and credential
+loading rather than network time. In Lambda, the reused client also keeps its connections warm.
+
+    cd lambdas && python benchmarks/invocation_overhead.py [--invocations 200]
+"""
+import argparse
+import importlib
+import os
+import statistics
+import sys
+import time
+
+LAMBDAS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, LAMBDAS_DIR)
+
+# Environment variables as in Lambda, so credential loading does not fall through to IMDS
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'benchmark')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'benchmark')
+os.environ.setdefault('tableName', 'Agents')
+
+import boto3
+from botocore.stub import Stubber
+
+import lambda_common
+
+EVENT = {'id': 'agent-1'}
+ITEM = {'Item': {'id': {'S': 'agent-1'}, 'role': {'S': 'Researcher'}}}
+
+
+def per_invocation_client(event):
+    # What every handler did before: a new client on each invocation
+    dynamodb_client = boto3.client('dynamodb')
+    with Stubber(dynamodb_client) as stubber:
+        stubber.add_response('get_item', ITEM)
+        dynamodb_client.get_item(TableName=os.environ['tableName'], Key={'id': {'S': event['id']}})
+
+
+def module_scope_client(handler, stubber):
+    def invoke(event):
+        stubber.add_response('get_item', ITEM)
+        result = handler.main(event, None)
+        assert result['statusCode'] == 200, result
+    return invoke
+
+
+def measure(invoke, invocations):
+    invoke(EVENT)  # The first call pays for loading the service model in both cases
+    samples = []
+    for _ in range(invocations):
+        started = time.perf_counter()
+        invoke(EVENT)
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--invocations', type=int, default=200)
+    args = parser.parse_args()
+
+    get_item = importlib.import_module('get-item')
+
+    before = measure(per_invocation_client, args.invocations)
+    with Stubber(lambda_common.dynamodb_client) as stubber:
+        after = measure(module_scope_client(get_item, stubber), args.invocations)
+
+    print(f"{'':<24}{'p50 ms':>10}{'p95 ms':>10}")
+    print(f"{'client per invocation':<24}{before[0]:>10.3f}{before[1]:>10.3f}")
+    print(f"{'module-scope client':<24}{after[0]:>10.3f}{after[1]:>10.3f}")
+    print(f"p50 overhead removed: {before[0] - after[0]:.3f} ms per invocation ({before[0] / after[0]:.1f}x faster)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+import importlib
+import json
+import os
+from lambda_common import response, TABLES
+
+# (method, API Gateway resource) -> (handler module, table, where the handler's event comes from)
+ROUTES = {
+    ('GET', '/agents'): ('get-agents', 'agents', 'query'),
+    ('POST', '/agents'): ('add-agent', 'agents', 'body'),
+    ('PUT', '/agents'): ('put-agent', 'agents', 'body'),
+    ('DELETE', '/agents'): ('delete-agents', 'agents', 'body'),
+    ('GET', '/agents/{id}'): ('get-item', 'agents', 'path'),
+    ('POST', '/agents/batch-get'): ('batch-get-items', 'agents', 'body'),
+    ('POST', '/agents/batch'): ('batch-write-items', 'agents', 'body'),
+    ('PUT', '/agents/batch'): ('batch-write-items', 'agents', 'body'),
+    ('DELETE', '/agents/batch'): ('batch-write-items', 'agents', 'body'),
+
+    ('GET', '/missions'): ('get-missions', 'missions', 'query'),
+    ('POST', '/missions'): ('add-mission', 'missions', 'body'),
+    ('PUT', '/missions'): ('put-mission', 'missions', 'body'),
+    ('DELETE', '/missions'): ('delete-missions', 'missions', 'body'),
+    ('GET', '/missions/{id}'): ('get-item', 'missions', 'path'),
+    ('POST', '/missions/batch'): ('batch-write-items', 'missions', 'body'),
+    ('PUT', '/missions/batch'): ('batch-write-items', 'missions', 'body'),
+    ('DELETE', '/missions/batch'): ('batch-write-items', 'missions', 'body'),
+
+    ('GET', '/tasks'): ('get-tasks', 'tasks', 'query'),
+    ('POST', '/tasks'): ('add-task', 'tasks', 'body'),
+    ('DELETE', '/tasks'): ('delete-task', 'tasks', 'body'),
+    ('GET', '/tasks/{id}'): ('get-item', 'tasks', 'path'),
+    ('POST', '/tasks/batch-get'): ('batch-get-items', 'tasks', 'body'),
+    ('POST', '/tasks/batch'): ('batch-write-items', 'tasks', 'body'),
+    ('PUT', '/tasks/batch'): ('batch-write-items', 'tasks', 'body'),
+    ('DELETE', '/tasks/batch'): ('batch-write-items', 'tasks', 'body'),
+
+    ('GET', '/runs'): ('get-runs', 'runs', 'query'),
+    ('POST', '/runs'): ('add-run', 'runs', 'body'),
+}
+
+# Every handler is imported during init, so one warm environment serves all routes
+HANDLERS = {name: importlib.import_module(name) for name, _, _ in ROUTES.values()}
+
+
+def parse_body(body):
+    if not body:
+        return {}
+    # Proxy events carry the body as a string, the routing request template as JSON
+    if isinstance(body, str):
+        return json.loads(body)
+    return body
+
+
+def route_event(event):
+    """Returns (handler module, table name, handler event) for an API Gateway event, or None for an unknown route."""
+    route = ROUTES.get((event.get('httpMethod'), event.get('resource')))
+    if route is None:
+        return None
+
+    name, table, source = route
+    if source == 'query':
+        handler_event = dict(event.get('queryStringParameters') or {})
+    elif source == 'path':
+        # Lookups by ID also take query parameters such as the version the caller already holds
+        handler_event = {**(event.get('queryStringParameters') or {}), **(event.get('pathParameters') or {})}
+    else:
+        handler_event = parse_body(event.get('body'))
+
+    return name, os.environ[TABLES[table]], handler_event
+
+
+def main(event, context):
+    methods = "OPTIONS,GET,PUT,POST,DELETE"
+
+    try:
+        route = route_event(event)
+    except ValueError as e:
+        return response(400, json.dumps({"error": f"Invalid JSON body: {str(e)}"}), methods)
+
+    if route is None:
+        return response(404, json.dumps({"error": f"No route for {event.get('httpMethod')} {event.get('resource')}"}), methods)
+
+    name, table_name, handler_event = route
+    return HANDLERS[name].main(handler_event, context, table_name=table_name)
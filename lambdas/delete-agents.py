@@ -1,45 +1,32 @@
-import boto3
 import json
 import os
+from lambda_common import dynamodb_client, response, require, ValidationError
+from batch_write import write_items, to_delete_request
 
-def main(event, context):
+def main(event, context, table_name=None):
     statusCode = 200
     isBase64Encoded = True
-    headers = {
-        "Content-Type": "application/json",
-        "Access-Control-Allow-Headers": "Content-Type",
-        "Access-Control-Allow-Origin": "*",
-        "Access-Control-Allow-Methods": "DELETE"
-    }
 
     body = ""
 
     try:
-        dynamodb_client = boto3.client('dynamodb')
-
         # Extract the list of agent IDs from the event
-        agent_ids = event['ids']  # Directly use the 'ids' list from the event
+        agent_ids = require(event, 'ids', list)
 
-        for agent_id in agent_ids:
-            # Delete each item from DynamoDB
-            dynamodb_client.delete_item(
-                TableName=os.environ['tableName'],
-                Key={
-                    'id': {'S': agent_id}
-                }
-            )
+        results = write_items(dynamodb_client, table_name or os.environ['tableName'], agent_ids, to_delete_request)
+        failed = [result['id'] for result in results if result['status'] != 'ok']
+        if failed:
+            raise Exception(f"Failed to delete agents: {', '.join(map(str, failed))}")
 
         body = "Agents deleted successfully."
 
+    except ValidationError as e:
+        statusCode = 400
+        body = f"Error: {str(e)}"
+
     except Exception as e:
         statusCode = 500
         body = f"Error: {str(e)}"
 
     finally:
-        response = {
-            "isBase64Encoded": isBase64Encoded,
-            "statusCode": statusCode,
-            "body": body,
-            "headers": headers
-        }
-        return response
\ No newline at end of file
+        return response(statusCode, body, "DELETE", isBase64Encoded)
@@ -1,44 +1,31 @@
-import boto3
 import json
 import os
+from lambda_common import dynamodb_client, response, require, ValidationError
+from batch_write import write_items, to_delete_request
 
-def main(event, context):
+def main(event, context, table_name=None):
     statusCode = 200
     isBase64Encoded = True
-    headers = {
-        "Content-Type": "application/json",
-        "Access-Control-Allow-Headers": "Content-Type",
-        "Access-Control-Allow-Origin": "*",
-        "Access-Control-Allow-Methods": "DELETE"
-    }
 
     body = ""
 
     try:
-        dynamodb_client = boto3.client('dynamodb')
+        mission_ids = require(event, 'ids', list)
 
-        mission_ids = event['ids']  
-
-        for mission_id in mission_ids:
-            # Delete each mission from DynamoDB
-            dynamodb_client.delete_item(
-                TableName=os.environ['tableName'],
-                Key={
-                    'id': {'S': mission_id}
-                }
-            )
+        results = write_items(dynamodb_client, table_name or os.environ['tableName'], mission_ids, to_delete_request)
+        failed = [result['id'] for result in results if result['status'] != 'ok']
+        if failed:
+            raise Exception(f"Failed to delete missions: {', '.join(map(str, failed))}")
 
         body = "Missions deleted successfully."
 
+    except ValidationError as e:
+        statusCode = 400
+        body = f"Error: {str(e)}"
+
     except Exception as e:
         statusCode = 500
         body = f"Error: {str(e)}"
 
     finally:
-        response = {
-            "isBase64Encoded": isBase64Encoded,
-            "statusCode": statusCode,
-            "body": body,
-            "headers": headers
-        }
-        return response
\ No newline at end of file
+        return response(statusCode, body, "DELETE", isBase64Encoded)
@@ -1,26 +1,18 @@
-import boto3
 import json
 import os
+from lambda_common import dynamodb_client, response, require_key, ValidationError
 
-def main(event, context):
+def main(event, context, table_name=None):
     statusCode = 200
     isBase64Encoded = True
-    headers = {
-        "Content-Type": "application/json",
-        "Access-Control-Allow-Headers": "Content-Type",
-        "Access-Control-Allow-Origin": "*",
-        "Access-Control-Allow-Methods": "DELETE"
-    }
 
     body = ""
 
     try:
-        dynamodb_client = boto3.client('dynamodb')
-
-        id = event['id']  
+        id = require_key(event, 'id')
 
         dynamodb_client.delete_item(
-            TableName=os.environ['tableName'],
+            TableName=table_name or os.environ['tableName'],
             Key={
                 'id': {'S': id}
             }
@@ -28,15 +20,13 @@ def main(event, context):
 
         body = "Task deleted successfully."
 
+    except ValidationError as e:
+        statusCode = 400
+        body = f"Error: {str(e)}"
+
     except Exception as e:
         statusCode = 500
         body = f"Error: {str(e)}"
 
     finally:
-        response = {
-            "isBase64Encoded": isBase64Encoded,
-            "statusCode": statusCode,
-            "body": body,
-            "headers": headers
-        }
-        return response
\ No newline at end of file
+        return response(statusCode, body, "DELETE", isBase64Encoded)
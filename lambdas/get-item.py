@@ -0,0 +1,40 @@
+import json
+import os
+from lambda_common import dynamodb_client, response, require_key, field, item_version, ValidationError
+
+def main(event, context, table_name=None):
+    statusCode = 200 
+    isBase64Encoded = False
+
+    try:
+        id = require_key(event, 'id')
+        # The version the caller already holds; an unchanged item is answered with 304 instead of its data
+        known_version = field(event, 'version')
+
+        get_response = dynamodb_client.get_item(
+            TableName=table_name or os.environ['tableName'],
+            Key={
+                'id': {'S': id}
+            }
+        )
+
+        item = get_response.get('Item')
+        if item is None:
+            statusCode = 404
+            body = json.dumps({"error": f"No item found with ID: {id}"})
+        elif known_version and item_version(item) == known_version:
+            statusCode = 304
+            body = json.dumps({"id": id, "version": known_version})
+        else:
+            body = json.dumps(item)
+
+    except ValidationError as e:
+        statusCode = 400
+        body = json.dumps({"error": str(e)})
+
+    except Exception as e:
+        statusCode = 500
+        body = json.dumps({"error": str(e)})
+
+    finally:
+        return response(statusCode, body, "GET", isBase64Encoded)
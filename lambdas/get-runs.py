@@ -0,0 +1,51 @@
+import json
+import os
+from lambda_common import dynamodb_client, response, field
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+def main(event, context, table_name=None):
+    statusCode = 200
+    isBase64Encoded = False
+
+    try:
+        # Query string values arrive as strings via the API Gateway request template
+        mission_id = field(event, 'mission_id')
+        inputs_hash = field(event, 'inputs_hash')
+        limit = min(int(event.get('limit') or DEFAULT_LIMIT), MAX_LIMIT)
+
+        if inputs_hash:
+            # Runs of an identical mission definition, newest first
+            query_args = {
+                'IndexName': os.environ['inputsHashIndex'],
+                'KeyConditionExpression': 'inputs_hash = :inputs_hash',
+                'ExpressionAttributeValues': {':inputs_hash': {'S': inputs_hash}},
+            }
+        elif mission_id:
+            query_args = {
+                'KeyConditionExpression': 'mission_id = :mission_id',
+                'ExpressionAttributeValues': {':mission_id': {'S': mission_id}},
+            }
+        else:
+            raise ValueError("mission_id or inputs_hash is required")
+
+        query_response = dynamodb_client.query(
+            TableName=table_name or os.environ['tableName'],
+            ScanIndexForward=False,
+            Limit=limit,
+            **query_args
+        )
+
+        body = json.dumps(query_response.get('Items', []))
+
+    except ValueError as e:
+        statusCode = 400
+        body = json.dumps({"error": str(e)})
+
+    except Exception as e:
+        statusCode = 500
+        body = json.dumps({"error": str(e)})
+
+    finally:
+        return response(statusCode, body, "GET", isBase64Encoded)
@@ -1,35 +1,26 @@
-import boto3
 import json
 import os
+from lambda_common import dynamodb_client, response
+from pagination import list_items
 
-def main(event, context):
+def main(event, context, table_name=None):
     statusCode = 200 
     isBase64Encoded = False
-    headers = {
-        "Content-Type": "application/json",
-        "Access-Control-Allow-Headers": "Content-Type",
-        "Access-Control-Allow-Origin": "*",
-        "Access-Control-Allow-Methods": "GET"
-    }
+
+    next_cursor = None
 
     try:
-        dynamodb_client = boto3.client('dynamodb')
-        table_name = os.environ['tableName']
-        scan_response = dynamodb_client.scan(
-            TableName=table_name
-        )
-        items = scan_response.get('Items', [])
+        table_name = table_name or os.environ['tableName']
+        items, next_cursor = list_items(dynamodb_client, table_name, event)
         body = json.dumps(items)
 
+    except ValueError as e:
+        statusCode = 400
+        body = json.dumps({"error": str(e)})
+
     except Exception as e:
         statusCode = 500
         body = json.dumps({"error": str(e)})
 
     finally:
-        response = {
-            "isBase64Encoded": isBase64Encoded,
-            "statusCode": statusCode,
-            "body": body,
-            "headers": headers
-        }
-        return response
\ No newline at end of file
+        return response(statusCode, body, "GET", isBase64Encoded, cursor=next_cursor)
@@ -0,0 +1,64 @@
+from collections import namedtuple
+from lambda_common import field, require, require_key, ValidationError
+
+# items: type of a list's elements; default: value written when an added item leaves the field out
+Rule = namedtuple('Rule', ['kind', 'required', 'items', 'default'], defaults=(False, None, None))
+
+# The fields each catalog table's items are written with; 'id' is always required
+ITEM_FIELDS = {
+    'agents': {
+        'role': Rule(str, required=True),
+        'goal': Rule(str, required=True),
+        'backstory': Rule(str, required=True),
+        'allow_delegation': Rule(bool, required=True),
+        'tools': Rule(list, items=str, default=[]),
+    },
+    'missions': {
+        'name': Rule(str, required=True),
+        'agents': Rule(list, required=True, items=str),
+        'game': Rule(str, required=True),
+        'tasks': Rule(list, items=str, default=[]),
+        'process': Rule(str, default="Sequential"),
+        'results': Rule(str, default=""),
+        # Mission-specific task wiring: {task_id: [ids of tasks it depends on]}
+        'depends_on': Rule(dict),
+    },
+    'tasks': {
+        'task': Rule(str, required=True),
+        'agent': Rule(str, required=True),
+        'description': Rule(str, required=True),
+        'expected_output': Rule(str, required=True),
+        # Optional IDs of tasks whose output this task needs; tasks without it keep serial chaining
+        'depends_on': Rule(list, items=str),
+    },
+}
+
+
+def to_attribute(value):
+    if isinstance(value, bool):
+        return {'BOOL': value}
+    if isinstance(value, list):
+        return {'L': [{'S': str(element)} for element in value]}
+    if isinstance(value, dict):
+        for dependencies in value.values():
+            if not isinstance(dependencies, list):
+                raise ValidationError("'depends_on' must map task IDs to lists of task IDs")
+        return {'M': {str(key): to_attribute(element) for key, element in value.items()}}
+    return {'S': value}
+
+
+def item_attributes(kind, event, partial=False):
+    """Validates event against the table's fields and returns its DynamoDB attributes.
+
+    A partial item, as sent to put-*, only holds the fields the event sets; a full item needs every
+    required field and gets the defaults of the fields it leaves out.
+    """
+    item = {'id': {'S': require_key(event, 'id')}}
+    for name, rule in ITEM_FIELDS[kind].items():
+        if rule.required and not partial:
+            value = require(event, name, rule.kind, items=rule.items)
+        else:
+            value = field(event, name, rule.kind, default=None if partial else rule.default, items=rule.items)
+        if value is not None:
+            item[name] = to_attribute(value)
+    return item
@@ -0,0 +1,109 @@
+import os
+import time
+import uuid
+import boto3
+from botocore.config import Config
+
+CLIENT_CONFIG = Config(
+    connect_timeout=float(os.getenv('DYNAMODB_CONNECT_TIMEOUT', '2')),
+    read_timeout=float(os.getenv('DYNAMODB_READ_TIMEOUT', '10')),
+    # Keeps pooled connections to DynamoDB open between invocations of a warm environment
+    tcp_keepalive=True,
+    # Parallel scans use up to 16 segments, each on its own connection
+    max_pool_connections=20,
+    # Throttling is retried with backoff; interactive requests fail fast instead of retrying ten times
+    retries={'mode': 'standard', 'max_attempts': int(os.getenv('DYNAMODB_MAX_ATTEMPTS', '3'))},
+)
+
+# Created once per execution environment, so warm invocations skip endpoint resolution,
+# credential loading and the TLS handshake
+dynamodb_client = boto3.client('dynamodb', config=CLIENT_CONFIG)
+
+# Environment variables the catalog Lambda reads each table's name from
+TABLES = {
+    'agents': 'agentsTable',
+    'missions': 'missionsTable',
+    'tasks': 'tasksTable',
+    'runs': 'runsTable',
+}
+
+TYPE_NAMES = {str: "a string", bool: "a boolean", list: "a list", dict: "an object", int: "a number"}
+
+
+class ValidationError(ValueError):
+    pass
+
+
+def table_kind(table_name):
+    """Returns which catalog table ('agents', 'missions', ...) a table name belongs to, or None.
+
+    Single-table Lambdas are told with itemKind; the catalog Lambda knows the names of every table.
+    """
+    if os.environ.get('itemKind'):
+        return os.environ['itemKind']
+    return next((kind for kind, variable in TABLES.items() if os.environ.get(variable) == table_name), None)
+
+
+def version_stamp():
+    """Attributes that change on every write, so readers can tell whether their copy of an item is current."""
+    return {
+        'updated_at': {'N': str(int(time.time() * 1000))},
+        'version': {'S': uuid.uuid4().hex},
+    }
+
+
+def item_version(item):
+    return (item or {}).get('version', {}).get('S')
+
+
+def cors_headers(methods):
+    return {
+        "Content-Type": "application/json",
+        "Access-Control-Allow-Headers": "Content-Type",
+        "Access-Control-Allow-Origin": "*",
+        "Access-Control-Allow-Methods": methods
+    }
+
+
+def response(status_code, body, methods, is_base64_encoded=False, **fields):
+    """The API Gateway integration response; extra fields such as cursor sit next to the body."""
+    return {
+        "isBase64Encoded": is_base64_encoded,
+        "statusCode": status_code,
+        "body": body,
+        "headers": cors_headers(methods),
+        **fields
+    }
+
+
+def field(event, name, kind=str, default=None, items=None):
+    """Returns event[name] after checking its type, or default when it is missing or null."""
+    if not isinstance(event, dict):
+        raise ValidationError("The request must be a JSON object")
+
+    value = event.get(name)
+    if value is None:
+        return default
+
+    # bool is a subclass of int, but true is not a valid number here
+    if not isinstance(value, kind) or (kind is int and isinstance(value, bool)):
+        raise ValidationError(f"'{name}' must be {TYPE_NAMES.get(kind, kind.__name__)}")
+    if items is not None and not all(isinstance(element, items) for element in value):
+        raise ValidationError(f"'{name}' must only contain {TYPE_NAMES.get(items, items.__name__)} values")
+
+    return value
+
+
+def require(event, name, kind=str, items=None):
+    value = field(event, name, kind, items=items)
+    if value is None:
+        raise ValidationError(f"'{name}' is required")
+    return value
+
+
+def require_key(event, name):
+    # DynamoDB rejects empty strings in key attributes
+    value = require(event, name)
+    if not value:
+        raise ValidationError(f"'{name}' must not be empty")
+    return value
@@ -0,0 +1,76 @@
+import base64
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_PAGE_SIZE = 1000
+MAX_SEGMENTS = 16
+
+def parse_list_params(event):
+    # Query string values arrive as strings via the API Gateway request template
+    event = event or {}
+    limit = event.get('limit')
+    segments = event.get('segments')
+    attributes = event.get('attributes')
+
+    return {
+        'limit': min(int(limit), MAX_PAGE_SIZE) if limit else None,
+        'cursor': event.get('cursor') or None,
+        'attributes': [a.strip() for a in attributes.split(',') if a.strip()] if attributes else None,
+        'segments': max(1, min(int(segments), MAX_SEGMENTS)) if segments else 1,
+    }
+
+def encode_cursor(key):
+    return base64.urlsafe_b64encode(json.dumps(key).encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor):
+    return json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+
+def projection_args(attributes):
+    if not attributes:
+        return {}
+
+    # Placeholders keep reserved words such as "name" and "role" usable; "id" is always returned
+    names = {f"#a{i}": name for i, name in enumerate(dict.fromkeys(['id', *attributes]))}
+    return {
+        'ProjectionExpression': ', '.join(names),
+        'ExpressionAttributeNames': names,
+    }
+
+def scan_page(dynamodb_client, table_name, limit, cursor=None, attributes=None):
+    scan_args = {'TableName': table_name, 'Limit': limit, **projection_args(attributes)}
+    if cursor:
+        scan_args['ExclusiveStartKey'] = decode_cursor(cursor)
+
+    scan_response = dynamodb_client.scan(**scan_args)
+    last_key = scan_response.get('LastEvaluatedKey')
+
+    return scan_response.get('Items', []), encode_cursor(last_key) if last_key else None
+
+def scan_all(dynamodb_client, table_name, attributes=None, segments=1):
+    def scan_segment(segment):
+        scan_args = {'TableName': table_name, **projection_args(attributes)}
+        if segments > 1:
+            scan_args.update(Segment=segment, TotalSegments=segments)
+
+        items = []
+        while True:
+            scan_response = dynamodb_client.scan(**scan_args)
+            items.extend(scan_response.get('Items', []))
+            if 'LastEvaluatedKey' not in scan_response:
+                return items
+            scan_args['ExclusiveStartKey'] = scan_response['LastEvaluatedKey']
+
+    if segments == 1:
+        return scan_segment(0)
+
+    with ThreadPoolExecutor(max_workers=segments) as pool:
+        return [item for items in pool.map(scan_segment, range(segments)) for item in items]
+
+def list_items(dynamodb_client, table_name, event):
+    """Returns (items, next_cursor). Without a limit every page is read, optionally with parallel segments."""
+    params = parse_list_params(event)
+
+    if params['limit']:
+        return scan_page(dynamodb_client, table_name, params['limit'], params['cursor'], params['attributes'])
+
+    return scan_all(dynamodb_client, table_name, params['attributes'], params['segments']), None
@@ -1,50 +1,33 @@
-import boto3
 import json
 import os
+from lambda_common import dynamodb_client, response, version_stamp, ValidationError
+from item_fields import item_attributes
 
-def main(event, context):
+def main(event, context, table_name=None):
     statusCode = 200
     isBase64Encoded = True
-    headers = {
-        "Content-Type": "application/json",
-        "Access-Control-Allow-Headers": "Content-Type",
-        "Access-Control-Allow-Origin": "*",
-        "Access-Control-Allow-Methods": "PUT"
-    }
 
     try:
-        dynamodb_client = boto3.client('dynamodb')
-
-        item = {'id': {'S': event['id']}}
-
-        optional_fields = ['role', 'goal', 'backstory', 'allow_delegation', 'tools']
-
-        for field in optional_fields:
-            if field in event:
-                if field == 'tools':
-                    item[field] = {'L': [{'S': str(element)} for element in event[field]]}
-                elif field == 'allow_delegation':
-                    item[field] = {'BOOL': event[field]}
-                else:
-                    item[field] = {'S': event[field]}
+        # Every field but the ID is optional here
+        item = item_attributes('agents', event, partial=True)
 
         # Put item into DynamoDB
+        item.update(version_stamp())
+
         put_response = dynamodb_client.put_item(
-            TableName=os.environ['tableName'],
+            TableName=table_name or os.environ['tableName'],
             Item=item
         )
 
         body = "Agent updated successfully."
 
+    except ValidationError as e:
+        statusCode = 400
+        body = f"Error: {str(e)}"
+
     except Exception as e:
         statusCode = 500
         body = f"Error: {str(e)}"
 
     finally:
-        response = {
-            "isBase64Encoded": isBase64Encoded,
-            "statusCode": statusCode,
-            "body": body,
-            "headers": headers
-        }
-        return response
\ No newline at end of file
+        return response(statusCode, body, "PUT", isBase64Encoded)
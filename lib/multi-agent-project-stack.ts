@@ -20,6 +20,7 @@ export class MultiAgentProjectStack extends cdk.Stack {
   private agentsTable: dynamodb.Table;
   private missionsTable: dynamodb.Table;
   private tasksTable: dynamodb.Table;
+  private missionRunsTable: dynamodb.Table;
   private api: apigateway.RestApi;
   
   private addAgentLambda: lambda.Function;
@@ -33,6 +34,18 @@ export class MultiAgentProjectStack extends cdk.Stack {
   private putMissionLambda: lambda.Function;
   private addMissionLambda: lambda.Function;
   private deleteMissionsLambda: lambda.Function;
+  private getAgentLambda: lambda.Function;
+  private getMissionLambda: lambda.Function;
+  private getTaskLambda: lambda.Function;
+  private batchGetAgentsLambda: lambda.Function;
+  private batchGetTasksLambda: lambda.Function;
+  private batchWriteAgentsLambda: lambda.Function;
+  private batchWriteMissionsLambda: lambda.Function;
+  private batchWriteTasksLambda: lambda.Function;
+  private addRunLambda: lambda.Function;
+  private getRunsLambda: lambda.Function;
+  // Set when every catalog route is served by the routed catalog function
+  private catalogLambda?: lambda.IFunction;
 
 private uiBucket: s3.Bucket;
   private uiDistribution: cloudfront.Distribution;
@@ -49,6 +62,12 @@ private uiBucket: s3.Bucket;
   }
 
   private createLambdas() {
+    // cdk deploy -c consolidatedCatalog=true serves every catalog route from one function and one warm pool
+    if (String(this.node.tryGetContext('consolidatedCatalog')) === 'true') {
+      this.createLambda_catalog();
+      return;
+    }
+
     this.createLambda_addAgent();
     this.createLambda_getAgents();
     this.createLambda_putAgent();
@@ -60,6 +79,89 @@ private uiBucket: s3.Bucket;
     this.createLambda_putMission();
     this.createLambda_addMission();
     this.createLambda_deleteMissions();
+    this.createLambda_getItems();
+    this.createLambda_batchWrite();
+    this.createLambda_runs();
+  }
+
+  private createLambda_catalog() {
+    const catalogFunction = new lambda.Function(this, 'Catalog', {
+      runtime: lambda.Runtime.PYTHON_3_11,
+      code: lambda.Code.fromAsset('./lambdas'),
+      handler: 'catalog.main',
+      environment: {
+        'agentsTable': this.agentsTable.tableName,
+        'missionsTable': this.missionsTable.tableName,
+        'tasksTable': this.tasksTable.tableName,
+        'runsTable': this.missionRunsTable.tableName,
+        'inputsHashIndex': 'inputs_hash-index',
+      }
+    });
+
+    for (const table of [this.agentsTable, this.missionsTable, this.tasksTable, this.missionRunsTable]) {
+      table.grantReadWriteData(catalogFunction);
+    }
+
+    // -c catalogProvisionedConcurrency=N keeps N initialized environments, which now cover every route
+    const provisionedConcurrency = Number(this.node.tryGetContext('catalogProvisionedConcurrency') ?? 0);
+    this.catalogLambda = provisionedConcurrency > 0
+      ? new lambda.Alias(this, 'CatalogLive', {
+          aliasName: 'live',
+          version: catalogFunction.currentVersion,
+          provisionedConcurrentExecutions: provisionedConcurrency,
+        })
+      : catalogFunction;
+  }
+
+  private createLambda_batchWrite() {
+    this.batchWriteAgentsLambda = this.createTableLambda('BatchWriteAgents', 'batch-write-items.main', this.agentsTable, 'dynamodb:BatchWriteItem');
+    this.batchWriteMissionsLambda = this.createTableLambda('BatchWriteMissions', 'batch-write-items.main', this.missionsTable, 'dynamodb:BatchWriteItem');
+    this.batchWriteTasksLambda = this.createTableLambda('BatchWriteTasks', 'batch-write-items.main', this.tasksTable, 'dynamodb:BatchWriteItem');
+
+    // Items are validated with the fields of the table they are written to
+    this.batchWriteAgentsLambda.addEnvironment('itemKind', 'agents');
+    this.batchWriteMissionsLambda.addEnvironment('itemKind', 'missions');
+    this.batchWriteTasksLambda.addEnvironment('itemKind', 'tasks');
+  }
+
+  private createLambda_runs() {
+    this.addRunLambda = this.createTableLambda('AddRun', 'add-run.main', this.missionRunsTable, 'dynamodb:PutItem');
+    this.getRunsLambda = this.createTableLambda('GetRuns', 'get-runs.main', this.missionRunsTable, 'dynamodb:Query');
+
+    // Looking up earlier runs of an identical mission definition goes through the inputs hash index
+    this.getRunsLambda.addEnvironment('inputsHashIndex', 'inputs_hash-index');
+    this.getRunsLambda.addToRolePolicy(new iam.PolicyStatement({
+      effect: iam.Effect.ALLOW,
+      actions: ['dynamodb:Query'],
+      resources: [`${this.missionRunsTable.tableArn}/index/*`]
+    }));
+  }
+
+  private createLambda_getItems() {
+    this.getAgentLambda = this.createTableLambda('GetAgent', 'get-item.main', this.agentsTable, 'dynamodb:GetItem');
+    this.getMissionLambda = this.createTableLambda('GetMission', 'get-item.main', this.missionsTable, 'dynamodb:GetItem');
+    this.getTaskLambda = this.createTableLambda('GetTask', 'get-item.main', this.tasksTable, 'dynamodb:GetItem');
+    this.batchGetAgentsLambda = this.createTableLambda('BatchGetAgents', 'batch-get-items.main', this.agentsTable, 'dynamodb:BatchGetItem');
+    this.batchGetTasksLambda = this.createTableLambda('BatchGetTasks', 'batch-get-items.main', this.tasksTable, 'dynamodb:BatchGetItem');
+  }
+
+  private createTableLambda(id: string, handler: string, table: dynamodb.Table, action: string) {
+    const fn = new lambda.Function(this, id, {
+      runtime: lambda.Runtime.PYTHON_3_11,
+      code: lambda.Code.fromAsset('./lambdas'),
+      handler: handler,
+      environment: {
+        'tableName': table.tableName,
+      }
+    });
+
+    fn.addToRolePolicy(new iam.PolicyStatement({
+      effect: iam.Effect.ALLOW,
+      actions: [action],
+      resources: [table.tableArn]
+    }));
+
+    return fn;
   }
 
 
@@ -75,7 +177,7 @@ private createLambda_deleteMissions() {
 
     this.deleteMissionsLambda.addToRolePolicy(new iam.PolicyStatement({
         effect: iam.Effect.ALLOW,
-        actions: ['dynamodb:DeleteItem'],
+        actions: ['dynamodb:BatchWriteItem'],
         resources: [this.missionsTable.tableArn]
     }));
 }
@@ -104,6 +206,32 @@ removalPolicy: cdk.RemovalPolicy.DESTROY,
       },
 removalPolicy: cdk.RemovalPolicy.DESTROY,
     });
+
+    // Run history: one item per mission run, newest first within a mission
+    this.missionRunsTable = new dynamodb.Table(this, 'MissionRunsTable', {
+      partitionKey: {
+        name: 'mission_id',
+        type: dynamodb.AttributeType.STRING,
+      },
+      sortKey: {
+        name: 'created_at',
+        type: dynamodb.AttributeType.NUMBER,
+      },
+      billingMode: dynamodb.BillingMode.PAY_PER_REQUEST,
+      removalPolicy: cdk.RemovalPolicy.DESTROY,
+    });
+
+    this.missionRunsTable.addGlobalSecondaryIndex({
+      indexName: 'inputs_hash-index',
+      partitionKey: {
+        name: 'inputs_hash',
+        type: dynamodb.AttributeType.STRING,
+      },
+      sortKey: {
+        name: 'created_at',
+        type: dynamodb.AttributeType.NUMBER,
+      },
+    });
   }
 
   private createLambda_deleteTask() {
@@ -203,7 +331,7 @@ removalPolicy: cdk.RemovalPolicy.DESTROY,
 
     this.deleteAgentsLambda.addToRolePolicy(new iam.PolicyStatement({
       effect: iam.Effect.ALLOW,
-      actions: ['dynamodb:DeleteItem'],
+      actions: ['dynamodb:BatchWriteItem'],
       resources: [this.agentsTable.tableArn]
     }));
   }
@@ -309,6 +437,38 @@ private createLambda_addMission() {
     }
   };
 
+  // Maps the list query string (?limit=&cursor=&attributes=&segments=) into the Lambda event
+  private listRequestTemplates = {
+    'application/json': JSON.stringify({
+      limit: "$util.escapeJavaScript($input.params('limit'))",
+      cursor: "$util.escapeJavaScript($input.params('cursor'))",
+      attributes: "$util.escapeJavaScript($input.params('attributes'))",
+      segments: "$util.escapeJavaScript($input.params('segments'))",
+    }),
+  };
+
+  // Passes the route and method along with the request, as catalog.main dispatches on them
+  private routedRequestTemplates = {
+    'application/json': `{
+      "resource": "$context.resourcePath",
+      "httpMethod": "$context.httpMethod",
+      "pathParameters": {#foreach($name in $input.params().path.keySet())"$name": "$util.escapeJavaScript($input.params().path.get($name))"#if($foreach.hasNext),#end#end},
+      "queryStringParameters": {#foreach($name in $input.params().querystring.keySet())"$name": "$util.escapeJavaScript($input.params().querystring.get($name))"#if($foreach.hasNext),#end#end},
+      "body": $input.json('$')
+    }`,
+  };
+
+  private createIntegration(fn: lambda.IFunction, requestTemplates?: { [contentType: string]: string }) {
+    return new apigateway.LambdaIntegration(this.catalogLambda ?? fn, {
+      proxy: false,
+      integrationResponses: [this.integrationResponse],
+      passthroughBehavior: apigateway.PassthroughBehavior.WHEN_NO_TEMPLATES,
+      requestTemplates: this.catalogLambda ? this.routedRequestTemplates : requestTemplates,
+      // One API-wide invoke permission keeps the routed function's policy under its size limit
+      scopePermissionToMethod: !this.catalogLambda,
+    });
+  }
+
   private createApi() {
     this.api = new apigateway.RestApi(this, `MutliAgentAPI`, {
       description: 'Multi Agent API',
@@ -322,30 +482,69 @@ private createLambda_addMission() {
     this.createApi_agents();
     this.createApi_missions();
     this.createApi_tasks(); 
+    this.createApi_runs();
   };
 
+  private createApi_runs() {
+    const runs = this.api.root.addResource('runs', {
+      defaultCorsPreflightOptions: this.defaultCorsPreflightOptions,
+    });
+
+    runs.addMethod('GET', this.createIntegration(this.getRunsLambda, {
+      'application/json': JSON.stringify({
+        mission_id: "$util.escapeJavaScript($input.params('mission_id'))",
+        inputs_hash: "$util.escapeJavaScript($input.params('inputs_hash'))",
+        limit: "$util.escapeJavaScript($input.params('limit'))",
+      }),
+    }), { methodResponses: [this.methodResponse] });
+
+    runs.addMethod('POST', this.createIntegration(this.addRunLambda), { methodResponses: [this.methodResponse] });
+  }
+
+  // Exposes POST (import), PUT (replace) and DELETE on /{resource}/batch, all backed by BatchWriteItem
+  private createApi_batchWrite(resource: apigateway.Resource, batchWriteLambda: lambda.Function) {
+    const batch = resource.addResource('batch', {
+      defaultCorsPreflightOptions: this.defaultCorsPreflightOptions,
+    });
+
+    for (const method of ['POST', 'PUT', 'DELETE']) {
+      batch.addMethod(method, this.createIntegration(batchWriteLambda), { methodResponses: [this.methodResponse] });
+    }
+  }
+
+  // Exposes GET /{resource}/{id} and, unless batchGetLambda is null, POST /{resource}/batch-get for direct lookups by ID
+  private createApi_getItems(resource: apigateway.Resource, getItemLambda: lambda.Function, batchGetLambda: lambda.Function | null) {
+    const item = resource.addResource('{id}', {
+      defaultCorsPreflightOptions: this.defaultCorsPreflightOptions,
+    });
+
+    item.addMethod('GET', this.createIntegration(getItemLambda, {
+      // ?version= makes the lookup conditional: an unchanged item comes back as a 304 payload
+      'application/json': `{"id": "$util.escapeJavaScript($input.params('id'))", "version": "$util.escapeJavaScript($input.params('version'))"}`,
+    }), { methodResponses: [this.methodResponse] });
+
+    if (batchGetLambda !== null) {
+      const batchGet = resource.addResource('batch-get', {
+        defaultCorsPreflightOptions: this.defaultCorsPreflightOptions,
+      });
+
+      batchGet.addMethod('POST', this.createIntegration(batchGetLambda), { methodResponses: [this.methodResponse] });
+    }
+  }
+
   private createApi_tasks() {
     const tasks = this.api.root.addResource('tasks', {
       defaultCorsPreflightOptions: this.defaultCorsPreflightOptions,
     });
   
-    tasks.addMethod('GET', new apigateway.LambdaIntegration(this.getTasksLambda, {
-      proxy: false,
-      integrationResponses: [this.integrationResponse],
-      passthroughBehavior: apigateway.PassthroughBehavior.WHEN_NO_TEMPLATES,
-    }), { methodResponses: [this.methodResponse] });
+    tasks.addMethod('GET', this.createIntegration(this.getTasksLambda, this.listRequestTemplates), { methodResponses: [this.methodResponse] });
   
-    tasks.addMethod('POST', new apigateway.LambdaIntegration(this.addTaskLambda, {
-      proxy: false,
-      integrationResponses: [this.integrationResponse],
-      passthroughBehavior: apigateway.PassthroughBehavior.WHEN_NO_TEMPLATES,
-    }), { methodResponses: [this.methodResponse] });
+    tasks.addMethod('POST', this.createIntegration(this.addTaskLambda), { methodResponses: [this.methodResponse] });
 
-    tasks.addMethod('DELETE', new apigateway.LambdaIntegration(this.deleteTaskLambda, { 
-      proxy: false,
-      integrationResponses: [this.integrationResponse],
-      passthroughBehavior: apigateway.PassthroughBehavior.WHEN_NO_TEMPLATES,
-    }), { methodResponses: [this.methodResponse] });
+    tasks.addMethod('DELETE', this.createIntegration(this.deleteTaskLambda), { methodResponses: [this.methodResponse] });
+
+    this.createApi_getItems(tasks, this.getTaskLambda, this.batchGetTasksLambda);
+    this.createApi_batchWrite(tasks, this.batchWriteTasksLambda);
   }
 
   private createApi_agents() {
@@ -353,29 +552,16 @@ private createLambda_addMission() {
       defaultCorsPreflightOptions: this.defaultCorsPreflightOptions,
     });
 
-    agents.addMethod('GET', new apigateway.LambdaIntegration(this.getAgentsLambda, {
-      proxy: false,
-      integrationResponses: [this.integrationResponse],
-      passthroughBehavior: apigateway.PassthroughBehavior.WHEN_NO_TEMPLATES,
-    }), { methodResponses: [this.methodResponse] });
+    agents.addMethod('GET', this.createIntegration(this.getAgentsLambda, this.listRequestTemplates), { methodResponses: [this.methodResponse] });
 
-    agents.addMethod('POST', new apigateway.LambdaIntegration(this.addAgentLambda, {
-      proxy: false,
-      integrationResponses: [this.integrationResponse],
-      passthroughBehavior: apigateway.PassthroughBehavior.WHEN_NO_TEMPLATES,
-    }), { methodResponses: [this.methodResponse] });
+    agents.addMethod('POST', this.createIntegration(this.addAgentLambda), { methodResponses: [this.methodResponse] });
 
-    agents.addMethod('PUT', new apigateway.LambdaIntegration(this.putAgentsLambda, {
-      proxy: false,
-      integrationResponses: [this.integrationResponse],
-      passthroughBehavior: apigateway.PassthroughBehavior.WHEN_NO_TEMPLATES,
-    }), { methodResponses: [this.methodResponse] });
+    agents.addMethod('PUT', this.createIntegration(this.putAgentsLambda), { methodResponses: [this.methodResponse] });
 
-    agents.addMethod('DELETE', new apigateway.LambdaIntegration(this.deleteAgentsLambda, {
-      proxy: false,
-      integrationResponses: [this.integrationResponse],
-      passthroughBehavior: apigateway.PassthroughBehavior.WHEN_NO_TEMPLATES,
-    }), { methodResponses: [this.methodResponse] });
+    agents.addMethod('DELETE', this.createIntegration(this.deleteAgentsLambda), { methodResponses: [this.methodResponse] });
+
+    this.createApi_getItems(agents, this.getAgentLambda, this.batchGetAgentsLambda);
+    this.createApi_batchWrite(agents, this.batchWriteAgentsLambda);
   }
 
   private createApi_missions() {
@@ -383,33 +569,20 @@ private createLambda_addMission() {
         defaultCorsPreflightOptions: this.defaultCorsPreflightOptions,
     });
 
-    missions.addMethod('GET', new apigateway.LambdaIntegration(this.getMissionsLambda, {
-        proxy: false,
-        integrationResponses: [this.integrationResponse],
-        passthroughBehavior: apigateway.PassthroughBehavior.WHEN_NO_TEMPLATES,
-    }), { methodResponses: [this.methodResponse] });
+    missions.addMethod('GET', this.createIntegration(this.getMissionsLambda, this.listRequestTemplates), { methodResponses: [this.methodResponse] });
 
-    missions.addMethod('PUT', new apigateway.LambdaIntegration(this.putMissionLambda, {
-        proxy: false,
-        integrationResponses: [this.integrationResponse],
-        passthroughBehavior: apigateway.PassthroughBehavior.WHEN_NO_TEMPLATES,
-    }), { methodResponses: [this.methodResponse] });
+    missions.addMethod('PUT', this.createIntegration(this.putMissionLambda), { methodResponses: [this.methodResponse] });
 
-    missions.addMethod('POST', new apigateway.LambdaIntegration(this.addMissionLambda, {
-        proxy: false,
-        integrationResponses: [this.integrationResponse],
-        passthroughBehavior: apigateway.PassthroughBehavior.WHEN_NO_TEMPLATES,
-    }), {
+    missions.addMethod('POST', this.createIntegration(this.addMissionLambda), {
         methodResponses: [this.methodResponse]
     });
 
-    missions.addMethod('DELETE', new apigateway.LambdaIntegration(this.deleteMissionsLambda, { 
-        proxy: false,
-        integrationResponses: [this.integrationResponse],
-        passthroughBehavior: apigateway.PassthroughBehavior.WHEN_NO_TEMPLATES,
-    }), { 
+    missions.addMethod('DELETE', this.createIntegration(this.deleteMissionsLambda), { 
         methodResponses: [this.methodResponse] 
     });
+
+    this.createApi_getItems(missions, this.getMissionLambda, null);
+    this.createApi_batchWrite(missions, this.batchWriteMissionsLambda);
 }
   
   private s3CorsRule: s3.CorsRule = {
@@ -481,6 +654,12 @@ private createLambda_addMission() {
       `),
     });
   
+    const llmApiOrigin = new origins.HttpOrigin(this.fargateService.loadBalancer.loadBalancerDnsName, {
+      protocolPolicy: cloudfront.OriginProtocolPolicy.HTTP_ONLY,
+      readTimeout: cdk.Duration.seconds(60),
+      keepaliveTimeout: cdk.Duration.seconds(60)
+    });
+
     this.uiDistribution = new cloudfront.Distribution(this, 'UIDistribution', {
       defaultBehavior: {
         origin: new origins.S3Origin(this.uiBucket, { originAccessIdentity: oai }),
@@ -493,16 +672,19 @@ private createLambda_addMission() {
       },
       // Add a behavior for the LLM API
       additionalBehaviors: {
-        '/results': {
-          origin: new origins.HttpOrigin(this.fargateService.loadBalancer.loadBalancerDnsName, {
-            protocolPolicy: cloudfront.OriginProtocolPolicy.HTTP_ONLY,
-            readTimeout: cdk.Duration.seconds(60),
-            keepaliveTimeout: cdk.Duration.seconds(60)
-          }),
+        '/results*': {
+          origin: llmApiOrigin,
           viewerProtocolPolicy: cloudfront.ViewerProtocolPolicy.REDIRECT_TO_HTTPS,
           cachePolicy: cloudfront.CachePolicy.CACHING_DISABLED,
           allowedMethods: cloudfront.AllowedMethods.ALLOW_ALL,
           originRequestPolicy: cloudfront.OriginRequestPolicy.ALL_VIEWER
+        },
+        // Generated images never change once written, so the edge can cache them
+        '/images/*': {
+          origin: llmApiOrigin,
+          viewerProtocolPolicy: cloudfront.ViewerProtocolPolicy.REDIRECT_TO_HTTPS,
+          cachePolicy: cloudfront.CachePolicy.CACHING_OPTIMIZED,
+          allowedMethods: cloudfront.AllowedMethods.ALLOW_GET_HEAD
         }
       },
       defaultRootObject: 'index.html',
@@ -572,7 +754,8 @@ private createLambda_addMission() {
     // Add SSM read permissions to task role
     taskDefinition.addToTaskRolePolicy(
       new iam.PolicyStatement({
-          actions: ['ssm:GetParameter'],
+          // The agents API batches its lookups with GetParameters
+          actions: ['ssm:GetParameter', 'ssm:GetParameters'],
           effect: iam.Effect.ALLOW,
           resources: [
               `arn:aws:ssm:${this.region}:${this.account}:parameter/api/*`,
@@ -3,12 +3,16 @@ import PropTypes from 'prop-types';
 import { SpaceBetween, Button, Box } from '@cloudscape-design/components';
 
 
-const ImageViewer = ({ imageFileName, imageData, fileName = 'generated-image' }) => {
+// Builds a data URL for legacy base64 outputs
+const toDataUrl = (imageData) => (
+    imageData.startsWith('data:') ? imageData :
+    imageData.startsWith('/9j/') ? 'data:image/jpeg;base64,' + imageData :
+    'data:image/png;base64,' + imageData  // Default to PNG if format can't be determined
+);
+
+const ImageViewer = ({ imageFileName, imageUrl, imageData, fileName = 'generated-image' }) => {
     const [isLoading] = useState(false);
-    
-    // Log image data for debugging (only the first 100 characters)
-    console.log('Image data type:', typeof imageData);
-    console.log('Image data preview:', imageData ? imageData.substring(0, 100) + '...' : 'No image data');
+    const src = imageUrl || toDataUrl(imageData || '');
 
     // Function to download the image
     const downloadImage = () => {
@@ -16,24 +20,12 @@ const ImageViewer = ({ imageFileName, imageData, fileName = 'generated-image' })
             // Create a link element
             const link = document.createElement('a');
             
-            // Ensure the image data is properly formatted
-            let imageUrl = imageData;
-            
-            // If it's a base64 string but doesn't have the data URL prefix, add it
-            if (imageData.startsWith('data:')) {
-                imageUrl = imageData;
-            } else if (imageData.startsWith('/9j/')) {
-                imageUrl = 'data:image/jpeg;base64,' + imageData;
-            } else if (imageData.startsWith('iVBORw0KGgo')) {
-                imageUrl = 'data:image/png;base64,' + imageData;
-            }
-            
-            // Set link's href to the image data
-            link.href = imageUrl;
+            // Set link's href to the image URL or data
+            link.href = src;
             
             // Ensure the filename has an extension
             let downloadFilename = fileName || 'generated-image';
-            if (!downloadFilename.endsWith('.png') && !downloadFilename.endsWith('.jpg') && !downloadFilename.endsWith('.jpeg')) {
+            if (!/\.(png|jpe?g|webp)$/.test(downloadFilename)) {
                 downloadFilename += '.png';
             }
             
@@ -57,12 +49,8 @@ return (
         <Box>
             <SpaceBetween direction="vertical" size="m">
                 <img 
-                    src={
-                        imageData.startsWith('data:') ? imageData :
-                        imageData.startsWith('/9j/') ? 'data:image/jpeg;base64,' + imageData :
-                        imageData.startsWith('iVBORw0KGgo') ? 'data:image/png;base64,' + imageData :
-                        'data:image/png;base64,' + imageData  // Default to PNG if format can't be determined
-                    } 
+                    src={src} 
+                    loading="lazy"
                     alt="Generated content" 
                     style={{ 
                         maxWidth: '100%', 
@@ -89,7 +77,8 @@ return (
 ImageViewer.propTypes = {
   imageFileName: PropTypes.string,
   llmApiUrl: PropTypes.string,
-  imageData: PropTypes.string.isRequired,
+  imageUrl: PropTypes.string,
+  imageData: PropTypes.string,
   fileName: PropTypes.string
 };
 
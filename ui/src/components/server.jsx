@@ -165,14 +165,23 @@ export async function addMission(mission) {
   return data;
 }
 
-export async function getMissionResult(missionId) {
+export function getImageUrl(path) {
+  // Image outputs reference GET /images/{id} on the LLM API instead of embedding base64 data
+  return `${llm_api}${path}`;
+}
+
+const RESULT_POLL_INTERVAL_MS = 3000;
+const RESULT_POLL_TIMEOUT_MS = 15 * 60 * 1000;
+
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
+// mode "cached" returns the last recorded result when the mission definition is unchanged
+export async function getMissionResult(missionId, mode = "run") {
   try {
     const url = `${llm_api}/results`;
     console.log("Fetching from:", url);
 
-    const controller = new AbortController();
-    const timeoutId = setTimeout(() => controller.abort(), 55000); // 55 second timeout
-
+    // Submit the mission as a job, then poll until the crew has finished
     const response = await fetch(url, {
       method: "POST",
       headers: {
@@ -181,19 +190,20 @@ export async function getMissionResult(missionId) {
       body: JSON.stringify({
         id: missionId,
         apiEndpoint: api,
+        async: true,
+        mode,
       }),
-      signal: controller.signal
-    }).finally(() => clearTimeout(timeoutId));
+    });
+
+    if (response.status === 429) {
+      return {
+        results: `The server is busy running other missions. Please try again in ${response.headers.get("Retry-After") || "a few"} seconds.`,
+        task_outputs: [],
+        execution_time: 0
+      };
+    }
 
     if (!response.ok) {
-      if (response.status === 504) {
-        console.log("Handling 504 error gracefully");
-        return {
-          results: "Request timed out. The mission too complex for the current timeout settings.",
-          task_outputs: [],
-          execution_time: 60
-        };
-      }
       return {
         results: `Error: HTTP status ${response.status}`,
         task_outputs: [],
@@ -201,15 +211,37 @@ export async function getMissionResult(missionId) {
       };
     }
 
-    const data = await response.json();
-    return data;
+    const { run_id } = await response.json();
+    const deadline = Date.now() + RESULT_POLL_TIMEOUT_MS;
+
+    while (Date.now() < deadline) {
+      await sleep(RESULT_POLL_INTERVAL_MS);
+
+      const runResponse = await fetch(`${url}/${run_id}`);
+      const run = await runResponse.json();
+
+      if (run.status === "completed") {
+        return run;
+      }
+      if (run.status === "failed" || runResponse.status === 404) {
+        return {
+          results: `Error: ${run.error}`,
+          task_outputs: [],
+          execution_time: 0
+        };
+      }
+    }
+
+    return {
+      results: "Request timed out. The mission too complex for the current timeout settings.",
+      task_outputs: [],
+      execution_time: RESULT_POLL_TIMEOUT_MS / 1000
+    };
   } catch (error) {
     console.log("Handling fetch error gracefully:", error);
     // Don't rethrow the error, return a result object instead
     return {
-      results: error.name === 'AbortError' 
-        ? "Request timed out. The mission too complex for the current timeout settings."
-        : `Error: ${error.message}`,
+      results: `Error: ${error.message}`,
       task_outputs: [],
       execution_time: 0
     };
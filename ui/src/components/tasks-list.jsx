@@ -4,7 +4,7 @@ import { SpaceBetween, Input, Modal, Box, Button, Container, Tabs} from '@clouds
 import Select from "@cloudscape-design/components/select";
 
 import Header from "@cloudscape-design/components/header";
-import { deleteTask, getAgents } from './server.jsx';
+import { deleteTask, getAgents, getImageUrl } from './server.jsx';
 import ImageViewer from './image-viewer.jsx';
 
 class TasksList extends React.Component {
@@ -79,11 +79,27 @@ class TasksList extends React.Component {
         // For image outputs, use the ImageViewer component which includes download functionality
         return (
           <ImageViewer 
+            imageUrl={outputJson.url ? getImageUrl(outputJson.url) : undefined}
             imageData={outputJson.data} 
-            fileName={`generated-image-${Date.now()}.png`}
+            fileName={outputJson.id || `generated-image-${Date.now()}.png`}
           />
         );
       }
+
+      if (outputJson.type === 'images') {
+        // Several images generated by one call, e.g. storyboard panels
+        return (
+          <SpaceBetween direction="vertical" size="m">
+            {outputJson.images.map((image) => (
+              <ImageViewer
+                key={image.id}
+                imageUrl={getImageUrl(image.url)}
+                fileName={image.id}
+              />
+            ))}
+          </SpaceBetween>
+        );
+      }
       
       // For text outputs
       return <span style={{ whiteSpace: 'pre-line' }}>{outputJson.data}</span>;